@@ -1,19 +1,93 @@
 from fastapi import APIRouter, HTTPException, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
-from typing import Optional
+from typing import Annotated, Optional, Dict, Tuple
+import asyncio
+import base64
+import functools
+import hashlib
+import hmac
 import jwt
-from datetime import datetime, timedelta
-from passlib.context import CryptContext
+import logging
+import orjson
+from datetime import datetime
+import os
+import time
+from argon2 import PasswordHasher, extract_parameters
+from argon2.exceptions import InvalidHashError, VerificationError
 
 from app.core.config import settings
+from app.core.user_store import user_store
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-# In-memory user storage (replace with database in production)
-users_db = {}
+# Calibrated on first use rather than at import, so cold starts that never
+# touch a password (e.g. a Lambda serving table listings) skip the
+# benchmark hash
+@functools.lru_cache(maxsize=None)
+def get_password_hasher() -> PasswordHasher:
+    """Pick the Argon2 time cost that makes one hash take about the target time on this machine"""
+    memory_cost = 64 * 1024
+    parallelism = os.cpu_count() or 1
+    base_time_cost = 3
+    
+    hasher = PasswordHasher(
+        time_cost=base_time_cost,
+        memory_cost=memory_cost,
+        parallelism=parallelism
+    )
+    target = settings.PASSWORD_HASH_TARGET_MS / 1000
+    if target <= 0:
+        return hasher
+    
+    # Hashing time grows linearly with the number of passes
+    start = time.perf_counter()
+    hasher.hash("benchmark")
+    elapsed = time.perf_counter() - start
+    time_cost = min(max(round(base_time_cost * target / elapsed), base_time_cost), 12)
+    
+    logger.info(
+        "Argon2 time cost calibrated to %d (%.0f ms per hash)",
+        time_cost, elapsed / base_time_cost * time_cost * 1000
+    )
+    return PasswordHasher(
+        time_cost=time_cost,
+        memory_cost=memory_cost,
+        parallelism=parallelism
+    )
+
+def _load_jwt_keys():
+    """Load the JWT signing and verification keys once at import"""
+    if settings.ALGORITHM.startswith(("RS", "ES", "PS")):
+        from cryptography.hazmat.primitives.serialization import load_pem_private_key
+        private_key = load_pem_private_key(settings.SECRET_KEY.encode(), password=None)
+        return private_key, private_key.public_key()
+    return settings.SECRET_KEY, settings.SECRET_KEY
+
+SIGNING_KEY, VERIFY_KEY = _load_jwt_keys()
+
+# Token settings are fixed for the life of the process
+_ALGORITHM = settings.ALGORITHM
+_ALGORITHMS = [settings.ALGORITHM]
+_EXPIRES_IN = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+# HMAC tokens are signed and verified directly; other algorithms go through PyJWT
+_HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+_HMAC_DIGEST = _HMAC_DIGESTS.get(_ALGORITHM)
+if _HMAC_DIGEST is not None:
+    _hmac_template = hmac.new(SIGNING_KEY.encode(), digestmod=_HMAC_DIGEST)
+    _JWT_HEADER = base64.urlsafe_b64encode(
+        orjson.dumps({"alg": _ALGORITHM, "typ": "JWT"})
+    ).rstrip(b"=")
+
+# Verified token payloads keyed by a keyed digest of the token, so lookups
+# never compare raw token bytes
+_TOKEN_CACHE_MAX = 10_000
+_token_cache_key = os.urandom(32)
+_token_cache: Dict[bytes, Tuple[dict, float]] = {}
 
 class UserCreate(BaseModel):
     username: str
@@ -38,47 +112,147 @@ class User(BaseModel):
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    if not hashed_password:
+        return False
+    try:
+        return get_password_hasher().verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return get_password_hasher().hash(password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Check if a stored hash is weaker than the current hasher's parameters"""
+    # The calibrated time cost can differ between workers and restarts, so
+    # only ever upgrade; rehashing on any difference would rewrite hashes
+    # back and forth
+    hasher = get_password_hasher()
+    try:
+        stored = extract_parameters(hashed_password)
+    except InvalidHashError:
+        return True
+    return (
+        stored.type != hasher.type
+        or stored.time_cost < hasher.time_cost
+        or stored.memory_cost < hasher.memory_cost
+    )
+
+@functools.lru_cache(maxsize=None)
+def _dummy_hash() -> str:
+    """Hash verified against on login misses so unknown usernames take as long as wrong passwords"""
+    return get_password_hash(os.urandom(16).hex())
+
+def _verify_or_dummy(plain_password: str, hashed_password: Optional[str]) -> bool:
+    """Verify a password, or verify against the dummy hash when there's no stored hash"""
+    # Run in a worker thread: the first dummy hash (and calibration) is as
+    # slow as any other hash
+    if not hashed_password:
+        verify_password(plain_password, _dummy_hash())
+        return False
+    return verify_password(plain_password, hashed_password)
+
+def _b64decode(data: str) -> bytes:
+    """Decode unpadded base64url"""
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _hmac_sign(signing_input: bytes) -> bytes:
+    """Sign a JWT header and payload with the shared secret"""
+    mac = _hmac_template.copy()
+    mac.update(signing_input)
+    return mac.digest()
 
 def create_access_token(data: dict) -> str:
     """Create JWT access token"""
-    to_encode = data.copy()
-    expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+    to_encode = {**data, "exp": int(time.time()) + _EXPIRES_IN}
+    
+    if _HMAC_DIGEST is None:
+        return jwt.encode(to_encode, SIGNING_KEY, algorithm=_ALGORITHM)
     
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
+    signing_input = (
+        _JWT_HEADER + b"." + base64.urlsafe_b64encode(orjson.dumps(to_encode)).rstrip(b"=")
+    )
+    signature = base64.urlsafe_b64encode(_hmac_sign(signing_input)).rstrip(b"=")
+    return (signing_input + b"." + signature).decode()
+
+def decode_access_token(token: str) -> dict:
+    """Check a token's signature and expiry and return its payload"""
+    if _HMAC_DIGEST is None:
+        return jwt.decode(token, VERIFY_KEY, algorithms=_ALGORITHMS)
+    
+    try:
+        header_b64, payload_b64, signature_b64 = token.split(".")
+        header = orjson.loads(_b64decode(header_b64))
+        if not isinstance(header, dict) or header.get("alg") != _ALGORITHM:
+            raise jwt.InvalidAlgorithmError("The specified alg value is not allowed")
+        
+        signature = _hmac_sign(f"{header_b64}.{payload_b64}".encode("ascii"))
+        if not hmac.compare_digest(signature, _b64decode(signature_b64)):
+            raise jwt.InvalidSignatureError("Signature verification failed")
+        
+        payload = orjson.loads(_b64decode(payload_b64))
+    except ValueError:
+        raise jwt.DecodeError("Invalid token")
+    
+    if not isinstance(payload, dict):
+        raise jwt.DecodeError("Invalid payload")
+    
+    expires_at = payload.get("exp")
+    if expires_at is not None:
+        if not isinstance(expires_at, (int, float)):
+            raise jwt.DecodeError("Expiration Time claim (exp) must be an integer")
+        if expires_at <= time.time():
+            raise jwt.ExpiredSignatureError("Signature has expired")
+    
+    return payload
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Verify JWT token"""
+    token = credentials.credentials
+    cache_key = hashlib.blake2b(
+        token.encode(), digest_size=16, key=_token_cache_key
+    ).digest()
+    
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        payload, expires_at = cached
+        if expires_at > time.time():
+            return payload
+        del _token_cache[cache_key]
+    
     try:
-        payload = jwt.decode(
-            credentials.credentials, 
-            settings.SECRET_KEY, 
-            algorithms=[settings.ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        return payload
+        payload = decode_access_token(token)
     except jwt.PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
+    
+    username: str = payload.get("sub")
+    if username is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    # Only tokens that expire can be cached safely
+    expires_at = payload.get("exp")
+    if expires_at is not None:
+        if len(_token_cache) >= _TOKEN_CACHE_MAX:
+            _token_cache.clear()
+        _token_cache[cache_key] = (payload, expires_at)
+    
+    return payload
+
+# Reusable dependency for routes that require a valid token
+TokenDep = Annotated[dict, Depends(verify_token)]
 
 @router.post("/register", response_model=dict)
 async def register(user_data: UserCreate):
     """Register a new user"""
-    if user_data.username in users_db:
+    if await user_store.exists(user_data.username):
         raise HTTPException(status_code=400, detail="Username already exists")
     
     # Hash password
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await asyncio.to_thread(get_password_hash, user_data.password)
     
     # Create user
-    user_id = f"user_{len(users_db) + 1}"
+    user_id = await user_store.next_user_id()
     user = {
         "id": user_id,
         "username": user_data.username,
@@ -88,7 +262,10 @@ async def register(user_data: UserCreate):
         "created_at": datetime.utcnow()
     }
     
-    users_db[user_data.username] = user
+    # The username may have been taken while hashing off the event loop;
+    # add only creates the user if it's still free
+    if not await user_store.add(user):
+        raise HTTPException(status_code=400, detail="Username already exists")
     
     # Create access token
     access_token = create_access_token(data={"sub": user_data.username})
@@ -104,17 +281,29 @@ async def register(user_data: UserCreate):
         },
         "access_token": access_token,
         "token_type": "bearer",
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        "expires_in": _EXPIRES_IN
     }
 
 @router.post("/login", response_model=dict)
 async def login(user_data: UserLogin):
     """Login user"""
-    user = users_db.get(user_data.username)
+    user = await user_store.get(user_data.username)
+    hashed_password = user["hashed_password"] if user else None
     
-    if not user or not verify_password(user_data.password, user["hashed_password"]):
+    # Always run a verification so response time doesn't reveal whether the user exists
+    password_ok = await asyncio.to_thread(
+        _verify_or_dummy, user_data.password, hashed_password
+    )
+    if not hashed_password or not password_ok:
         raise HTTPException(status_code=401, detail="Invalid username or password")
     
+    # Upgrade the stored hash if it's weaker than the current parameters
+    if password_needs_rehash(hashed_password):
+        await user_store.set_password_hash(
+            user_data.username,
+            await asyncio.to_thread(get_password_hash, user_data.password)
+        )
+    
     # Create access token
     access_token = create_access_token(data={"sub": user_data.username})
     
@@ -129,14 +318,14 @@ async def login(user_data: UserLogin):
         },
         "access_token": access_token,
         "token_type": "bearer",
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        "expires_in": _EXPIRES_IN
     }
 
 @router.get("/me", response_model=dict)
-async def get_current_user(token_data: dict = Depends(verify_token)):
+async def get_current_user(token_data: TokenDep):
     """Get current user information"""
     username = token_data.get("sub")
-    user = users_db.get(username)
+    user = await user_store.get(username)
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -153,11 +342,11 @@ async def get_current_user(token_data: dict = Depends(verify_token)):
     }
 
 @router.post("/refresh", response_model=dict)
-async def refresh_token(token_data: dict = Depends(verify_token)):
+async def refresh_token(token_data: TokenDep):
     """Refresh access token"""
     username = token_data.get("sub")
     
-    if not username or username not in users_db:
+    if not username or not await user_store.exists(username):
         raise HTTPException(status_code=401, detail="Invalid token")
     
     # Create new access token
@@ -167,21 +356,13 @@ async def refresh_token(token_data: dict = Depends(verify_token)):
         "success": True,
         "access_token": access_token,
         "token_type": "bearer",
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        "expires_in": _EXPIRES_IN
     }
 
 @router.get("/users", response_model=dict)
-async def get_all_users(token_data: dict = Depends(verify_token)):
+async def get_all_users(token_data: TokenDep):
     """Get all users (for admin/debugging)"""
-    users_list = []
-    for username, user in users_db.items():
-        users_list.append({
-            "id": user["id"],
-            "username": user["username"],
-            "email": user["email"],
-            "chips": user["chips"],
-            "created_at": user["created_at"].isoformat()
-        })
+    users_list = await user_store.all_users()
     
     return {
         "success": True,
@@ -193,8 +374,7 @@ async def get_all_users(token_data: dict = Depends(verify_token)):
 @router.post("/guest", response_model=dict)
 async def create_guest_user():
     """Create a guest user for quick play"""
-    import uuid
-    guest_id = str(uuid.uuid4())
+    guest_id = base64.urlsafe_b64encode(os.urandom(16)).rstrip(b"=").decode()
     guest_username = f"Guest_{guest_id[:8]}"
     
     # Create guest user
@@ -208,7 +388,8 @@ async def create_guest_user():
         "is_guest": True
     }
     
-    users_db[guest_username] = user
+    if not await user_store.add(user):
+        raise HTTPException(status_code=409, detail="Guest name already taken, please retry")
     
     # Create access token
     access_token = create_access_token(data={"sub": guest_username})
@@ -224,5 +405,5 @@ async def create_guest_user():
         },
         "access_token": access_token,
         "token_type": "bearer",
-        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        "expires_in": _EXPIRES_IN
     } 
\ No newline at end of file
@@ -1,4 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 from pydantic import BaseModel
 
@@ -24,48 +26,43 @@ class PlayerActionRequest(BaseModel):
     player_id: str
     action: PlayerAction
     hand_index: int = 0
+    seq: Optional[int] = None
 
 @router.post("/tables", response_model=dict)
 async def create_table(request: CreateTableRequest):
     """Create a new game table"""
-    try:
-        table = game_engine.create_table(
-            name=request.name,
-            min_bet=request.min_bet,
-            max_bet=request.max_bet
-        )
-        return {
-            "success": True,
-            "table": table.dict(),
-            "message": "Table created successfully"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/tables", response_model=dict)
+    table = game_engine.create_table(
+        name=request.name,
+        min_bet=request.min_bet,
+        max_bet=request.max_bet
+    )
+    return {
+        "success": True,
+        "table": table.to_dict(),
+        "message": "Table created successfully"
+    }
+
+@router.get("/tables", response_model=None)
 async def get_all_tables():
     """Get all available tables"""
-    try:
-        tables = game_engine.get_all_tables()
-        return {
-            "success": True,
-            "tables": [table.dict() for table in tables],
-            "count": len(tables)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-@router.get("/tables/{table_id}", response_model=dict)
+    tables = game_engine.get_all_tables()
+    return ORJSONResponse({
+        "success": True,
+        "tables": [table.to_dict() for table in tables],
+        "count": len(tables)
+    })
+
+@router.get("/tables/{table_id}", response_model=None)
 async def get_table(table_id: str):
     """Get specific table information"""
     table = game_engine.get_table(table_id)
     if not table:
         raise HTTPException(status_code=404, detail="Table not found")
     
-    return {
+    return ORJSONResponse({
         "success": True,
-        "table": table.dict()
-    }
+        "table": table.to_dict()
+    })
 
 @router.post("/tables/{table_id}/join", response_model=dict)
 async def join_table(table_id: str, request: JoinTableRequest):
@@ -77,7 +74,7 @@ async def join_table(table_id: str, request: JoinTableRequest):
     
     return {
         "success": True,
-        "player": player.dict(),
+        "player": player.model_dump(),
         "message": message
     }
 
@@ -120,7 +117,7 @@ async def start_game(table_id: str):
     return {
         "success": True,
         "message": message,
-        "table": table.dict() if table else None
+        "table": table.to_dict() if table else None
     }
 
 @router.post("/tables/{table_id}/action", response_model=dict)
@@ -130,18 +127,19 @@ async def player_action(table_id: str, request: PlayerActionRequest):
         table_id, 
         request.player_id, 
         request.action, 
-        request.hand_index
+        request.hand_index,
+        request.seq
     )
     
     if not success:
-        raise HTTPException(status_code=400, detail=message)
+        raise HTTPException(status_code=409 if message == "RESYNC" else 400, detail=message)
     
     table = game_engine.get_table(table_id)
     return {
         "success": True,
         "message": message,
         "result": result,
-        "table": table.dict() if table else None
+        "table": table.to_dict() if table else None
     }
 
 @router.post("/tables/{table_id}/reset", response_model=dict)
@@ -156,10 +154,10 @@ async def reset_table(table_id: str):
     return {
         "success": True,
         "message": "Table reset successfully",
-        "table": table.dict() if table else None
+        "table": table.to_dict() if table else None
     }
 
-@router.get("/tables/{table_id}/state", response_model=dict)
+@router.get("/tables/{table_id}/state", response_model=None)
 async def get_table_state(table_id: str, player_id: Optional[str] = None):
     """Get current table state"""
     table = game_engine.get_table(table_id)
@@ -168,10 +166,29 @@ async def get_table_state(table_id: str, player_id: Optional[str] = None):
         raise HTTPException(status_code=404, detail="Table not found")
     
     # Could implement player-specific views here
-    return {
+    return ORJSONResponse({
         "success": True,
-        "table": table.dict()
-    }
+        "table": table.to_dict()
+    })
+
+@router.get("/tables/{table_id}/odds", response_model=None)
+async def get_table_odds(table_id: str):
+    """Get the dealer outcome odds and each hand's expected return if it stood now"""
+    table = game_engine.get_table(table_id)
+    
+    if not table:
+        raise HTTPException(status_code=404, detail="Table not found")
+    if not table.dealer.upcard:
+        raise HTTPException(status_code=400, detail="No cards have been dealt")
+    
+    # An uncached shoe composition takes a few ms to enumerate, so it's done
+    # off the event loop; the expected results then reuse the cached odds
+    dealer_outcomes = await run_in_threadpool(game_engine.dealer_outcome_probabilities, table_id)
+    return ORJSONResponse({
+        "success": True,
+        "dealer_outcomes": dealer_outcomes,
+        "expected_results": game_engine.expected_results(table_id)
+    })
 
 @router.get("/health", response_model=dict)
 async def health_check():
@@ -1,22 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from typing import List, Optional
 from pydantic import BaseModel
 
 from app.core.game_engine import game_engine
-from app.models.game import GameState
-from app.api.auth import verify_token
+from app.models.game import GameState, Suit, CardRank
+from app.api.auth import TokenDep
 
 router = APIRouter()
 
-class TableSummary(BaseModel):
-    id: str
-    name: str
-    state: GameState
-    player_count: int
-    max_players: int
-    min_bet: int
-    max_bet: int
-    is_full: bool
+# Spectator card views indexed by Card.code, shared across responses
+_SPECTATOR_CARDS = tuple(
+    {"suit": suit, "rank": rank} for suit in Suit for rank in CardRank
+)
 
 class CreateTableRequest(BaseModel):
     name: str
@@ -24,141 +20,73 @@ class CreateTableRequest(BaseModel):
     maxBet: int
     maxPlayers: int
 
-@router.get("/", response_model=dict)
+@router.get("/", response_model=None)
 async def list_tables(
     state: Optional[GameState] = Query(None, description="Filter by game state"),
     available_only: bool = Query(False, description="Show only tables with available seats")
 ):
     """List all tables with optional filtering"""
-    try:
-        tables = game_engine.get_all_tables()
-        
-        # Apply filters
-        if state:
-            tables = [t for t in tables if t.state == state]
-        
+    # Start from the narrowest index that matches the filters
+    if state:
+        tables = game_engine.get_tables_by_state(state)
         if available_only:
-            tables = [t for t in tables if not t.is_full]
-        
-        # Create summary objects
-        table_summaries = []
-        for table in tables:
-            summary = TableSummary(
-                id=table.id,
-                name=table.name,
-                state=table.state,
-                player_count=len(table.players),
-                max_players=table.max_players,
-                min_bet=table.min_bet,
-                max_bet=table.max_bet,
-                is_full=table.is_full
-            )
-            table_summaries.append(summary.dict())
-        
-        return {
-            "success": True,
-            "tables": table_summaries,
-            "count": len(table_summaries),
-            "filters": {
-                "state": state,
-                "available_only": available_only
-            }
+            tables = [t for t in tables if game_engine.is_available(t)]
+    elif available_only:
+        tables = game_engine.get_available_tables()
+    else:
+        tables = game_engine.get_all_tables()
+    
+    table_summaries = list(game_engine.iter_table_summaries(tables))
+    
+    return ORJSONResponse({
+        "success": True,
+        "tables": table_summaries,
+        "count": len(table_summaries),
+        "filters": {
+            "state": state,
+            "available_only": available_only
         }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    })
 
-@router.get("/available", response_model=dict)
+@router.get("/available", response_model=None)
 async def get_available_tables():
     """Get tables that have available seats"""
-    try:
-        tables = game_engine.get_all_tables()
-        available_tables = [t for t in tables if not t.is_full]
-        
-        table_summaries = []
-        for table in available_tables:
-            summary = TableSummary(
-                id=table.id,
-                name=table.name,
-                state=table.state,
-                player_count=len(table.players),
-                max_players=table.max_players,
-                min_bet=table.min_bet,
-                max_bet=table.max_bet,
-                is_full=table.is_full
-            )
-            table_summaries.append(summary.dict())
-        
-        return {
-            "success": True,
-            "tables": table_summaries,
-            "count": len(table_summaries)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    available_tables = game_engine.get_available_tables()
+    
+    table_summaries = list(game_engine.iter_table_summaries(available_tables))
+    
+    return ORJSONResponse({
+        "success": True,
+        "tables": table_summaries,
+        "count": len(table_summaries)
+    })
 
-@router.get("/active", response_model=dict)
+@router.get("/active", response_model=None)
 async def get_active_tables():
     """Get tables that are currently in a game"""
-    try:
-        tables = game_engine.get_all_tables()
-        active_tables = [
-            t for t in tables 
-            if t.state in [GameState.PLAYING, GameState.DEALER_TURN, GameState.BETTING]
-        ]
-        
-        table_summaries = []
-        for table in active_tables:
-            summary = TableSummary(
-                id=table.id,
-                name=table.name,
-                state=table.state,
-                player_count=len(table.players),
-                max_players=table.max_players,
-                min_bet=table.min_bet,
-                max_bet=table.max_bet,
-                is_full=table.is_full
-            )
-            table_summaries.append(summary.dict())
-        
-        return {
-            "success": True,
-            "tables": table_summaries,
-            "count": len(table_summaries)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    active_tables = game_engine.get_tables_by_state(
+        GameState.PLAYING, GameState.DEALER_TURN, GameState.BETTING
+    )
+    
+    table_summaries = list(game_engine.iter_table_summaries(active_tables))
+    
+    return ORJSONResponse({
+        "success": True,
+        "tables": table_summaries,
+        "count": len(table_summaries)
+    })
 
-@router.get("/stats", response_model=dict)
+@router.get("/stats", response_model=None)
 async def get_table_stats():
     """Get overall table statistics"""
-    try:
-        tables = game_engine.get_all_tables()
-        
-        stats = {
-            "total_tables": len(tables),
-            "available_tables": len([t for t in tables if not t.is_full]),
-            "full_tables": len([t for t in tables if t.is_full]),
-            "active_games": len([
-                t for t in tables 
-                if t.state in [GameState.PLAYING, GameState.DEALER_TURN]
-            ]),
-            "waiting_tables": len([t for t in tables if t.state == GameState.WAITING]),
-            "total_players": sum(len(t.players) for t in tables),
-            "states": {}
-        }
-        
-        # Count tables by state
-        for state in GameState:
-            stats["states"][state.value] = len([t for t in tables if t.state == state])
-        
-        return {
-            "success": True,
-            "stats": stats
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    stats = game_engine.get_table_stats()
+    
+    return ORJSONResponse({
+        "success": True,
+        "stats": stats
+    })
 
-@router.get("/{table_id}/players", response_model=dict)
+@router.get("/{table_id}/players", response_model=None)
 async def get_table_players(table_id: str):
     """Get players at a specific table"""
     table = game_engine.get_table(table_id)
@@ -179,15 +107,15 @@ async def get_table_players(table_id: str):
         }
         players_info.append(player_info)
     
-    return {
+    return ORJSONResponse({
         "success": True,
         "table_id": table_id,
         "players": players_info,
         "player_count": len(players_info),
         "max_players": table.max_players
-    }
+    })
 
-@router.get("/{table_id}/spectate", response_model=dict)
+@router.get("/{table_id}/spectate", response_model=None)
 async def spectate_table(table_id: str):
     """Get table information for spectators (limited view)"""
     table = game_engine.get_table(table_id)
@@ -209,11 +137,9 @@ async def spectate_table(table_id: str):
     }
     
     # Add dealer upcard if available
-    if table.dealer.upcard:
-        spectator_view["dealer_upcard"] = {
-            "suit": table.dealer.upcard.suit,
-            "rank": table.dealer.upcard.rank
-        }
+    upcard = table.dealer.upcard
+    if upcard:
+        spectator_view["dealer_upcard"] = _SPECTATOR_CARDS[upcard.code]
     
     # Add limited player information
     for i, player in enumerate(table.players):
@@ -229,109 +155,83 @@ async def spectate_table(table_id: str):
         # Add visible cards (not hole cards)
         if player.hands and table.state != GameState.WAITING:
             hand = player.hands[0]  # Show first hand only for spectators
-            visible_cards = []
-            for card in hand.cards:
-                if not card.hidden:
-                    visible_cards.append({
-                        "suit": card.suit,
-                        "rank": card.rank
-                    })
+            visible_cards = [
+                _SPECTATOR_CARDS[card.code] for card in hand.cards if not card.hidden
+            ]
             player_info["visible_cards"] = visible_cards
             player_info["hand_value"] = hand.value if visible_cards else None
         
         spectator_view["players"].append(player_info)
     
-    return {
+    return ORJSONResponse({
         "success": True,
         "spectator_view": spectator_view
-    }
+    })
 
 @router.post("/", response_model=dict)
-async def create_table(table_data: CreateTableRequest, token_data: dict = Depends(verify_token)):
+async def create_table(table_data: CreateTableRequest, token_data: TokenDep):
     """Create a new table"""
-    try:
-        # Get user info from token
-        username = token_data.get("sub")
-        if not username:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        # Create table using game engine
-        table = game_engine.create_table(
-            name=table_data.name,
-            min_bet=table_data.minBet,
-            max_bet=table_data.maxBet,
-            max_players=table_data.maxPlayers
-        )
-        
-        return {
-            "success": True,
-            "message": "Table created successfully",
-            "data": {
-                "id": table.id,
-                "name": table.name,
-                "state": table.state,
-                "min_bet": table.min_bet,
-                "max_bet": table.max_bet,
-                "max_players": table.max_players,
-                "player_count": len(table.players),
-                "is_full": table.is_full
-            }
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Get user info from token
+    username = token_data.get("sub")
+    if not username:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    # Create table using game engine
+    table = game_engine.create_table(
+        name=table_data.name,
+        min_bet=table_data.minBet,
+        max_bet=table_data.maxBet,
+        max_players=table_data.maxPlayers
+    )
+    
+    return {
+        "success": True,
+        "message": "Table created successfully",
+        "data": game_engine.table_summary(table)
+    }
 
 @router.post("/{table_id}/join", response_model=dict)
-async def join_table(table_id: str, token_data: dict = Depends(verify_token)):
+async def join_table(table_id: str, token_data: TokenDep):
     """Join a table"""
-    try:
-        # Get user info from token
-        username = token_data.get("sub")
-        if not username:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        # Get table
-        table = game_engine.get_table(table_id)
-        if not table:
-            raise HTTPException(status_code=404, detail="Table not found")
-        
-        # Check if table is full
-        if table.is_full:
-            raise HTTPException(status_code=400, detail="Table is full")
-        
-        # Add player to table (this would need to be implemented in game_engine)
-        # For now, return success
-        return {
-            "success": True,
-            "message": f"Successfully joined table {table.name}",
-            "table_id": table_id
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    # Get user info from token
+    username = token_data.get("sub")
+    if not username:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    # Get table
+    table = game_engine.get_table(table_id)
+    if not table:
+        raise HTTPException(status_code=404, detail="Table not found")
+    
+    # Check if table is full
+    if table.is_full:
+        raise HTTPException(status_code=400, detail="Table is full")
+    
+    # Add player to table (this would need to be implemented in game_engine)
+    # For now, return success
+    return {
+        "success": True,
+        "message": f"Successfully joined table {table.name}",
+        "table_id": table_id
+    }
 
 @router.post("/{table_id}/leave", response_model=dict)
-async def leave_table(table_id: str, token_data: dict = Depends(verify_token)):
+async def leave_table(table_id: str, token_data: TokenDep):
     """Leave a table"""
-    try:
-        # Get user info from token
-        username = token_data.get("sub")
-        if not username:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        
-        # Get table
-        table = game_engine.get_table(table_id)
-        if not table:
-            raise HTTPException(status_code=404, detail="Table not found")
-        
-        # Remove player from table (this would need to be implemented in game_engine)
-        # For now, return success
-        return {
-            "success": True,
-            "message": f"Successfully left table {table.name}",
-            "table_id": table_id
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+    # Get user info from token
+    username = token_data.get("sub")
+    if not username:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    
+    # Get table
+    table = game_engine.get_table(table_id)
+    if not table:
+        raise HTTPException(status_code=404, detail="Table not found")
+    
+    # Remove player from table (this would need to be implemented in game_engine)
+    # For now, return success
+    return {
+        "success": True,
+        "message": f"Successfully left table {table.name}",
+        "table_id": table_id
+    }
\ No newline at end of file
@@ -10,6 +10,8 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
+    # Argon2 time cost is tuned at startup so one hash takes about this long (0 disables)
+    PASSWORD_HASH_TARGET_MS: int = 250
     
     # Database
     DATABASE_URL: Optional[str] = None
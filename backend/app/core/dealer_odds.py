@@ -0,0 +1,89 @@
+from typing import Dict, List, Tuple
+
+# Dealer final outcomes, in the order returned by dealer_probabilities
+OUTCOMES = ("17", "18", "19", "20", "21", "bust")
+BUST = len(OUTCOMES) - 1
+
+# Hole card value that would give each upcard a natural
+NATURAL_HOLE_CARDS = {1: 10, 10: 1}
+
+# Outcome vectors keyed by (upcard value, remaining counts of values 1-10).
+# The same upcard and shoe composition recur often across rounds and
+# simulations, so each is only enumerated once.
+_CACHE_MAX = 50_000
+_cache: Dict[Tuple[int, Tuple[int, ...]], Tuple[float, ...]] = {}
+
+def _play_out(total: int, has_ace: bool, counts: List[int], remaining: int) -> List[float]:
+    """Enumerate every way the dealer can finish from a hard total"""
+    outcome = [0.0] * len(OUTCOMES)
+    
+    # Dealer hits soft 17, matching Dealer.should_hit
+    if has_ace and total + 10 <= 21:
+        if total + 10 >= 18:
+            outcome[total + 10 - 17] = 1.0
+            return outcome
+    elif total >= 17:
+        outcome[BUST if total > 21 else total - 17] = 1.0
+        return outcome
+    
+    for value in range(1, 11):
+        count = counts[value - 1]
+        if not count:
+            continue
+        
+        probability = count / remaining
+        counts[value - 1] -= 1
+        drawn = _play_out(total + value, has_ace or value == 1, counts, remaining - 1)
+        counts[value - 1] += 1
+        
+        for i, p in enumerate(drawn):
+            outcome[i] += probability * p
+    
+    return outcome
+
+def dealer_probabilities(upcard: int, counts: Tuple[int, ...], peeked: bool = False) -> Tuple[float, ...]:
+    """Get the probability of each dealer outcome for an upcard value"""
+    # counts holds the unseen cards by value: index 0 = ace, index 9 = ten-valued.
+    # peeked means the dealer has already checked for blackjack without
+    # finding one, so the hole card can't complete a natural.
+    key = (upcard, counts, peeked)
+    cached = _cache.get(key)
+    if cached is not None:
+        return cached
+    
+    excluded = NATURAL_HOLE_CARDS.get(upcard) if peeked else None
+    if excluded is None:
+        probabilities = tuple(_play_out(upcard, upcard == 1, list(counts), sum(counts)))
+    else:
+        probabilities = tuple(_play_out_peeked(upcard, excluded, list(counts)))
+    
+    if len(_cache) >= _CACHE_MAX:
+        _cache.clear()
+    _cache[key] = probabilities
+    return probabilities
+
+def _play_out_peeked(upcard: int, excluded: int, counts: List[int]) -> List[float]:
+    """Enumerate the dealer's finishes given the hole card isn't the excluded value"""
+    outcome = [0.0] * len(OUTCOMES)
+    remaining = sum(counts)
+    
+    # The hole card is drawn from everything but the excluded value; later
+    # cards come from the whole remaining shoe again
+    candidates = remaining - counts[excluded - 1]
+    if not candidates:
+        return outcome
+    
+    for value in range(1, 11):
+        count = counts[value - 1]
+        if value == excluded or not count:
+            continue
+        
+        probability = count / candidates
+        counts[value - 1] -= 1
+        drawn = _play_out(upcard + value, upcard == 1 or value == 1, counts, remaining - 1)
+        counts[value - 1] += 1
+        
+        for i, p in enumerate(drawn):
+            outcome[i] += probability * p
+    
+    return outcome
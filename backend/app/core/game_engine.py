@@ -1,26 +1,125 @@
 import random
-from typing import List, Optional, Tuple, Dict, Any
+import secrets
+from typing import List, Optional, Tuple, Dict, Any, Iterable, Iterator
 from app.models.game import (
     Card, Hand, Player, Dealer, GameTable, GameState, 
-    PlayerAction, Suit, CardRank, GameResult
+    PlayerAction, GameResult, CARD_POOL
 )
+from app.core.dealer_odds import OUTCOMES, BUST, dealer_probabilities
+
+# Reshuffle before a round once fewer than this many cards are left in the shoe
+CUT_CARD = 20
+
+# Base value of each card code (see Card.code)
+CODE_VALUES = bytes(card.value for card in CARD_POOL)
+
+# Hand and dealer states used to look up a hand's settlement
+HAND_NORMAL, HAND_BUST, HAND_BLACKJACK, HAND_SURRENDERED = range(4)
+DEALER_NORMAL, DEALER_BUST, DEALER_BLACKJACK = range(3)
+
+def _settlement(hand_state: int, dealer_state: int, comparison: int) -> Tuple[int, int, str]:
+    """Get (numerator, denominator, result) of the chips returned per bet"""
+    if hand_state == HAND_SURRENDERED:
+        return 1, 2, "surrendered"
+    if hand_state == HAND_BUST:
+        return 0, 1, "bust"
+    if hand_state == HAND_BLACKJACK:
+        # Blackjack pays 3:2 and pushes against a dealer blackjack
+        if dealer_state == DEALER_BLACKJACK:
+            return 1, 1, "push"
+        return 5, 2, "blackjack"
+    if dealer_state == DEALER_BUST or comparison > 0:
+        return 2, 1, "win"
+    if comparison == 0:
+        return 1, 1, "push"
+    return 0, 1, "lose"
+
+# Settlements keyed by (hand state, dealer state, hand value compared to
+# the dealer's as -1/0/1), so a hand settles with a single lookup and
+# integer arithmetic
+SETTLEMENTS: Dict[Tuple[int, int, int], Tuple[int, int, str]] = {
+    (hand_state, dealer_state, comparison): _settlement(hand_state, dealer_state, comparison)
+    for hand_state in range(4)
+    for dealer_state in range(3)
+    for comparison in (-1, 0, 1)
+}
 
 class BlackjackEngine:
     """Core blackjack game engine handling all game logic"""
     
     def __init__(self):
         self.tables: Dict[str, GameTable] = {}
-    
-    def create_deck(self, num_decks: int = 6) -> List[Card]:
-        """Create a shuffled deck of cards"""
-        deck = []
-        for _ in range(num_decks):
-            for suit in Suit:
-                for rank in CardRank:
-                    deck.append(Card(suit=suit, rank=rank))
         
-        random.shuffle(deck)
-        return deck
+        # Secondary indexes so listings only touch matching tables.
+        # Dicts are used as insertion-ordered sets of table IDs.
+        self._by_state: Dict[GameState, Dict[str, None]] = {state: {} for state in GameState}
+        self._available: Dict[str, None] = {}
+        self._total_players = 0
+        
+        # Independently seeded RNG per table ID, so tables never share
+        # shuffle state
+        self._rngs: Dict[str, random.Random] = {}
+        
+        # Settled results of the current round by table ID
+        self._round_results: Dict[str, List[GameResult]] = {}
+        
+        # Every shoe is a permutation of the same card codes
+        self._master_shoe = self.create_deck()
+        self._master_counts = [0] * 10
+        for code in self._master_shoe:
+            self._master_counts[CODE_VALUES[code] - 1] += 1
+    
+    def create_deck(self, num_decks: int = 6) -> bytes:
+        """Create an unshuffled shoe of card codes (one byte per card)"""
+        return bytes(range(len(CARD_POOL))) * num_decks
+    
+    @staticmethod
+    def _shuffle_inplace(cards: bytearray, rng: random.Random):
+        """Fisher-Yates shuffle without random.shuffle's per-swap division"""
+        # Multiply-and-shift maps 32 random bits onto [0, i]; the bias is
+        # negligible for a 312-card shoe
+        getrandbits = rng.getrandbits
+        for i in range(len(cards) - 1, 0, -1):
+            j = ((i + 1) * getrandbits(32)) >> 32
+            cards[i], cards[j] = cards[j], cards[i]
+    
+    def _reshuffle(self, table: GameTable):
+        """Replace the table's shoe with a freshly shuffled one"""
+        rng = self._rngs.get(table.id)
+        if rng is None:
+            rng = self._rngs[table.id] = random.Random(secrets.randbits(128))
+        
+        shoe = bytearray(self._master_shoe)
+        self._shuffle_inplace(shoe, rng)
+        table.shoe = bytes(shoe)
+        table.deck_pos = 0
+        table.shoe_counts = self._master_counts.copy()
+    
+    def _draw_card(self, table: GameTable) -> Card:
+        """Deal the next card from the shoe, reshuffling if it runs out"""
+        if table.deck_pos >= len(table.shoe):
+            self._reshuffle(table)
+        code = table.shoe[table.deck_pos]
+        table.deck_pos += 1
+        table.shoe_counts[CODE_VALUES[code] - 1] -= 1
+        return CARD_POOL[code]
+    
+    def _draw_cards(self, table: GameTable, count: int) -> Tuple[Card, ...]:
+        """Deal several cards from the shoe at once"""
+        if table.deck_pos + count > len(table.shoe):
+            self._reshuffle(table)
+        start = table.deck_pos
+        table.deck_pos += count
+        codes = table.shoe[start:table.deck_pos]
+        shoe_counts = table.shoe_counts
+        for code in codes:
+            shoe_counts[CODE_VALUES[code] - 1] -= 1
+        return tuple(CARD_POOL[code] for code in codes)
+    
+    def _reshuffle_if_needed(self, table: GameTable):
+        """Reshuffle between rounds once the cut card is reached"""
+        if table.deck_pos > len(table.shoe) - CUT_CARD:
+            self._reshuffle(table)
     
     def create_table(self, name: str, min_bet: int = 10, max_bet: int = 500, max_players: int = 6) -> GameTable:
         """Create a new game table"""
@@ -28,12 +127,29 @@ class BlackjackEngine:
             name=name,
             min_bet=min_bet,
             max_bet=max_bet,
-            max_players=max_players,
-            deck=self.create_deck()
+            max_players=max_players
         )
+        self._reshuffle(table)
         self.tables[table.id] = table
+        self._by_state[table.state][table.id] = None
+        self._update_availability(table)
         return table
     
+    def _set_state(self, table: GameTable, state: GameState):
+        """Change a table's state and keep the state index in sync"""
+        if table.state == state:
+            return
+        self._by_state[table.state].pop(table.id, None)
+        self._by_state[state][table.id] = None
+        table.state = state
+    
+    def _update_availability(self, table: GameTable):
+        """Keep the available-seat index in sync with the player count"""
+        if table.is_full:
+            self._available.pop(table.id, None)
+        else:
+            self._available[table.id] = None
+    
     def join_table(self, table_id: str, player_name: str, player_id: str = None) -> Tuple[bool, str, Optional[Player]]:
         """Add a player to a table"""
         if table_id not in self.tables:
@@ -42,22 +158,24 @@ class BlackjackEngine:
         table = self.tables[table_id]
         
         # Check if player with same name already exists
-        existing_player = next((p for p in table.players if p.name == player_name), None)
+        existing_player = table.get_player_by_name(player_name)
         if existing_player:
             return True, "Player already at table", existing_player
         
         # Also check by player_id if provided
         if player_id:
-            existing_player_by_id = next((p for p in table.players if p.id == player_id), None)
+            existing_player_by_id = table.get_player(player_id)
             if existing_player_by_id:
                 return True, "Player already at table", existing_player_by_id
         
         if table.is_full:
             return False, "Table is full", None
         
-        # Find available seat
-        occupied_seats = {p.seat_position for p in table.players}
-        available_seat = next(i for i in range(1, table.max_players + 1) if i not in occupied_seats)
+        # Find the lowest free seat from the occupied-seat bitmap
+        free_seats = ~table.seat_bitmap & ((1 << table.max_players) - 1)
+        if not free_seats:
+            return False, "Table is full", None
+        available_seat = (free_seats & -free_seats).bit_length()
         
         player = Player(
             name=player_name,
@@ -68,7 +186,10 @@ class BlackjackEngine:
         if player_id:
             player.id = player_id
         
-        table.players.append(player)
+        table.add_player(player)
+        self._total_players += 1
+        self._update_availability(table)
+        table.touch()
         return True, "Joined successfully", player
     
     def leave_table(self, table_id: str, player_id: str) -> bool:
@@ -77,13 +198,20 @@ class BlackjackEngine:
             return False
         
         table = self.tables[table_id]
-        table.players = [p for p in table.players if p.id != player_id]
+        player = table.remove_player(player_id)
+        if player:
+            self._total_players -= 1
+            if table.state == GameState.PLAYING:
+                table.unfinished_hands -= self._unfinished_hand_count(player)
+                table.live_hands -= self._live_hand_count(player)
+        self._update_availability(table)
         
         # If no players left, reset table
         if not table.players:
-            table.state = GameState.WAITING
+            self._set_state(table, GameState.WAITING)
             table.current_player_index = 0
         
+        table.touch()
         return True
     
     def place_bet(self, table_id: str, player_id: str, amount: int) -> Tuple[bool, str]:
@@ -92,7 +220,7 @@ class BlackjackEngine:
             return False, "Table not found"
         
         table = self.tables[table_id]
-        player = next((p for p in table.players if p.id == player_id), None)
+        player = table.get_player(player_id)
         
         if not player:
             return False, "Player not found"
@@ -103,22 +231,25 @@ class BlackjackEngine:
         if amount > player.chips:
             return False, "Insufficient chips"
         
+        # Keep the hand counts in step when betting mid-round
+        if table.state == GameState.PLAYING:
+            table.unfinished_hands += 1 - self._unfinished_hand_count(player)
+            table.live_hands += 1 - self._live_hand_count(player)
+        
+        if player.is_active and not player.has_bet:
+            table.bets_placed += 1
+        
         # Create initial hand with bet
         hand = Hand(bet=amount)
         player.hands = [hand]
         player.current_hand_index = 0
         player.chips -= amount
         
-        # Check if all players have placed bets and auto-start game
-        all_players_bet = all(
-            len(p.hands) > 0 and p.hands[0].bet > 0 
-            for p in table.players if p.is_active
-        )
-        
-        if all_players_bet and len(table.active_players) > 0:
-            # Auto-start the game
+        # Auto-start the game once every active player has bet
+        if table.bets_placed == len(table.active_players) > 0:
             self._auto_start_game(table)
         
+        table.touch()
         return True, "Bet placed successfully"
     
     def _auto_start_game(self, table: GameTable):
@@ -127,8 +258,7 @@ class BlackjackEngine:
             return
         
         # Reset deck if running low
-        if len(table.deck) < 20:
-            table.deck = self.create_deck()
+        self._reshuffle_if_needed(table)
         
         # Reset dealer
         table.dealer = Dealer()
@@ -136,7 +266,7 @@ class BlackjackEngine:
         # Deal initial cards
         self._deal_initial_cards(table)
         
-        table.state = GameState.PLAYING
+        self._set_state(table, GameState.PLAYING)
         table.current_player_index = 0
         
         # Check for immediate blackjacks
@@ -158,8 +288,7 @@ class BlackjackEngine:
                 return False, f"Player {player.name} hasn't placed a bet"
         
         # Reset deck if running low
-        if len(table.deck) < 20:
-            table.deck = self.create_deck()
+        self._reshuffle_if_needed(table)
         
         # Reset dealer
         table.dealer = Dealer()
@@ -167,69 +296,69 @@ class BlackjackEngine:
         # Deal initial cards
         self._deal_initial_cards(table)
         
-        table.state = GameState.PLAYING
+        self._set_state(table, GameState.PLAYING)
         table.current_player_index = 0
         
+        table.touch()
         return True, "Game started"
     
     def _deal_initial_cards(self, table: GameTable):
         """Deal initial two cards to each player and dealer"""
-        # Deal first card to each player
-        for player in table.active_players:
-            card = table.deck.pop()
-            player.hands[0].cards.append(card)
-        
-        # Deal first card to dealer (face up)
-        dealer_card = table.deck.pop()
-        table.dealer.hand.cards.append(dealer_card)
-        
-        # Deal second card to each player
-        for player in table.active_players:
-            card = table.deck.pop()
-            player.hands[0].cards.append(card)
-        
-        # Deal second card to dealer (face down)
-        dealer_card = table.deck.pop()
-        dealer_card.hidden = True
-        table.dealer.hand.cards.append(dealer_card)
+        self._round_results.pop(table.id, None)
+        table.unfinished_hands = len(table.active_players)
+        table.live_hands = len(table.active_players)
+        
+        # Take both rounds of cards in one slice, in the usual order: one to
+        # each player, dealer face up, one more to each player, dealer face down
+        players = table.active_players
+        n = len(players)
+        cards = self._draw_cards(table, 2 * (n + 1))
+        
+        for i, player in enumerate(players):
+            player.hands[0].set_cards([cards[i], cards[n + 1 + i]])
+        
+        # Shoe cards are shared, so the hole card gets its own copy to carry
+        # the hidden flag
+        hole_card = cards[2 * n + 1].model_copy(update={"hidden": True})
+        table.dealer.hand.set_cards([cards[n], hole_card])
     
     def _check_initial_blackjacks(self, table: GameTable):
-        """Check for blackjacks after initial deal"""
-        dealer_has_blackjack = table.dealer.hand.is_blackjack
+        """Finish blackjack hands and find the first player to act, in one pass"""
+        # The dealer peeks: with a dealer blackjack no one gets to act, so
+        # every hand is finished and the round settles straight away
+        if table.dealer.hand.is_blackjack:
+            for player in table.active_players:
+                self._finish_hand(table, player.hands[0])
+            self._dealer_turn(table)
+            return
         
-        # Check for player blackjacks but don't finish the game yet
-        for player in table.active_players:
+        first_to_act = None
+        for i, player in enumerate(table.active_players):
             hand = player.hands[0]
             if hand.is_blackjack:
-                hand.is_finished = True
-                # Don't pay out yet - wait for dealer to play
+                # Paid out with everyone else once the dealer has played
+                self._finish_hand(table, hand)
+            elif first_to_act is None:
+                first_to_act = i
         
-        # If dealer shows an Ace or 10-value card, check for blackjack later
-        # For now, just set up the first player to act
-        table.current_player_index = 0
-        
-        # Find first player who needs to act (skip blackjacks)
-        self._find_next_active_player_initial(table)
-    
-    def _find_next_active_player_initial(self, table: GameTable):
-        """Find the first player who needs to act (for initial setup)"""
-        for i, player in enumerate(table.active_players):
-            hand = player.current_hand
-            if hand and not hand.is_finished:
-                table.current_player_index = i
-                return
-        
-        # If all players have blackjack or are finished, go to dealer
-        self._dealer_turn(table)
+        if first_to_act is None:
+            # Everyone has blackjack, so go straight to the dealer
+            self._dealer_turn(table)
+        else:
+            table.current_player_index = first_to_act
     
     def player_action(self, table_id: str, player_id: str, action: PlayerAction, 
-                     hand_index: int = 0) -> Tuple[bool, str, Dict[str, Any]]:
+                     hand_index: int = 0, client_seq: Optional[int] = None) -> Tuple[bool, str, Dict[str, Any]]:
         """Process a player action"""
         if table_id not in self.tables:
             return False, "Table not found", {}
         
         table = self.tables[table_id]
-        player = next((p for p in table.players if p.id == player_id), None)
+        
+        # Reject actions made against an out-of-date view of the table
+        if client_seq is not None and client_seq != table.session_seq:
+            return False, "RESYNC", {"current_seq": table.session_seq}
+        player = table.get_player(player_id)
         
         if not player:
             return False, "Player not found", {}
@@ -240,33 +369,21 @@ class BlackjackEngine:
         if hand_index >= len(player.hands):
             return False, "Invalid hand index", {}
         
-        hand = player.hands[hand_index]
-        result = {}
-        
-        if action == PlayerAction.HIT:
-            success, message, data = self._hit(table, player, hand_index)
-            result.update(data)
-        elif action == PlayerAction.STAND:
-            success, message, data = self._stand(table, player, hand_index)
-            result.update(data)
-        elif action == PlayerAction.DOUBLE:
-            success, message, data = self._double_down(table, player, hand_index)
-            result.update(data)
-        elif action == PlayerAction.SPLIT:
-            success, message, data = self._split(table, player, hand_index)
-            result.update(data)
-        elif action == PlayerAction.SURRENDER:
-            success, message, data = self._surrender(table, player, hand_index)
-            result.update(data)
-        else:
+        handler = self._ACTION_HANDLERS.get(action)
+        if handler is None:
             return False, "Invalid action", {}
         
+        success, message, result = handler(self, table, player, hand_index)
+        
         # Check if all players are done
         if self._all_players_done(table):
             self._dealer_turn(table)
-            self._calculate_results(table)
-            table.state = GameState.FINISHED
         
+        if success:
+            table.session_seq += 1
+            result["seq"] = table.session_seq
+        
+        table.touch()
         return success, message, result
     
     def _hit(self, table: GameTable, player: Player, hand_index: int) -> Tuple[bool, str, Dict[str, Any]]:
@@ -277,14 +394,15 @@ class BlackjackEngine:
             return False, "Hand is already finished", {}
         
         # Deal card
-        card = table.deck.pop()
-        hand.cards.append(card)
+        card = self._draw_card(table)
+        hand.add_card(card)
         
-        result = {"card": card.dict(), "hand_value": hand.value}
+        result = {"card": card.to_dict(), "hand_value": hand.value}
         
         # Check for bust
         if hand.is_bust:
-            hand.is_finished = True
+            table.live_hands -= 1
+            self._finish_hand(table, hand)
             result["bust"] = True
             self._next_hand_or_player(table, player)
         
@@ -293,7 +411,7 @@ class BlackjackEngine:
     def _stand(self, table: GameTable, player: Player, hand_index: int) -> Tuple[bool, str, Dict[str, Any]]:
         """Player stands"""
         hand = player.hands[hand_index]
-        hand.is_finished = True
+        self._finish_hand(table, hand)
         
         self._next_hand_or_player(table, player)
         
@@ -315,12 +433,14 @@ class BlackjackEngine:
         hand.is_doubled = True
         
         # Deal one card
-        card = table.deck.pop()
-        hand.cards.append(card)
-        hand.is_finished = True
+        card = self._draw_card(table)
+        hand.add_card(card)
+        self._finish_hand(table, hand)
+        if hand.is_bust:
+            table.live_hands -= 1
         
         result = {
-            "card": card.dict(),
+            "card": card.to_dict(),
             "hand_value": hand.value,
             "new_bet": hand.bet,
             "bust": hand.is_bust
@@ -341,23 +461,31 @@ class BlackjackEngine:
             return False, "Insufficient chips to split", {}
         
         # Create new hand with second card
-        second_card = hand.cards.pop()
+        second_card = hand.pop_card()
         new_hand = Hand(cards=[second_card], bet=hand.bet, is_split=True)
         hand.is_split = True
         
         # Deduct chips for second hand
         player.chips -= hand.bet
         
-        # Insert new hand after current hand
-        player.hands.insert(hand_index + 1, new_hand)
+        # Split hands can't be split again, so a split only ever happens on a
+        # player's single starting hand and the new hand goes on the end
+        player.hands.append(new_hand)
+        table.unfinished_hands += 1
+        table.live_hands += 1
         
         # Deal new cards to both hands
-        hand.cards.append(table.deck.pop())
-        new_hand.cards.append(table.deck.pop())
+        first_card = self._draw_card(table)
+        second_card = self._draw_card(table)
+        hand.add_card(first_card)
+        new_hand.add_card(second_card)
         
+        # Only the newly dealt cards are sent; the split cards are already
+        # known from the table state each action response carries
         return True, "Hand split", {
-            "first_hand": [card.dict() for card in hand.cards],
-            "second_hand": [card.dict() for card in new_hand.cards],
+            "new_hand_index": len(player.hands) - 1,
+            "first_card": first_card.to_dict(),
+            "second_card": second_card.to_dict(),
             "first_value": hand.value,
             "second_value": new_hand.value
         }
@@ -370,7 +498,7 @@ class BlackjackEngine:
             return False, "Can only surrender with initial two cards", {}
         
         hand.is_surrendered = True
-        hand.is_finished = True
+        self._finish_hand(table, hand)
         
         # Return half the bet
         player.chips += hand.bet // 2
@@ -379,6 +507,15 @@ class BlackjackEngine:
         
         return True, "Hand surrendered", {"chips_returned": hand.bet // 2}
     
+    # Handlers for each playable action; each returns a fresh result dict
+    _ACTION_HANDLERS = {
+        PlayerAction.HIT: _hit,
+        PlayerAction.STAND: _stand,
+        PlayerAction.DOUBLE: _double_down,
+        PlayerAction.SPLIT: _split,
+        PlayerAction.SURRENDER: _surrender
+    }
+    
     def _next_hand_or_player(self, table: GameTable, player: Player):
         """Move to next hand or next player"""
         # Use the centralized logic for finding next active player
@@ -386,7 +523,10 @@ class BlackjackEngine:
     
     def _find_next_active_player(self, table: GameTable):
         """Find the next player who needs to act"""
-        current_player = table.active_players[table.current_player_index]
+        # Read the cached list once; it can't change while seeking a player
+        active_players = table.active_players
+        n_active = len(active_players)
+        current_player = active_players[table.current_player_index]
         
         # Check if current player has more hands to play
         if current_player.current_hand_index + 1 < len(current_player.hands):
@@ -402,11 +542,11 @@ class BlackjackEngine:
             table.current_player_index += 1
             
             # If we've gone through all players, move to dealer turn
-            if table.current_player_index >= len(table.active_players):
+            if table.current_player_index >= n_active:
                 self._dealer_turn(table)
                 return
             
-            current_player = table.active_players[table.current_player_index]
+            current_player = active_players[table.current_player_index]
             current_player.current_hand_index = 0  # Reset to first hand
             current_hand = current_player.current_hand
             
@@ -419,102 +559,179 @@ class BlackjackEngine:
                 self._dealer_turn(table)
                 return
     
+    def _finish_hand(self, table: GameTable, hand: Hand):
+        """Mark a hand finished and count it off the round's unfinished hands"""
+        if not hand.is_finished:
+            hand.is_finished = True
+            table.unfinished_hands -= 1
+    
+    @staticmethod
+    def _unfinished_hand_count(player: Player) -> int:
+        """Count a player's hands that still need to be played"""
+        return sum(not hand.is_finished for hand in player.hands)
+    
+    @staticmethod
+    def _live_hand_count(player: Player) -> int:
+        """Count a player's hands that haven't bust"""
+        return sum(not hand.is_bust for hand in player.hands)
+    
     def _all_players_done(self, table: GameTable) -> bool:
         """Check if all players have finished their turns"""
-        for player in table.active_players:
-            for hand in player.hands:
-                if not hand.is_finished:
-                    return False
-        return True
+        return table.unfinished_hands == 0
     
     def _dealer_turn(self, table: GameTable):
         """Play dealer's turn"""
-        table.state = GameState.DEALER_TURN
+        # Only the first call in a round plays the dealer out
+        if table.state != GameState.PLAYING:
+            return
+        
+        self._set_state(table, GameState.DEALER_TURN)
         
         # Reveal hidden card (hole card)
         if len(table.dealer.hand.cards) > 1:
             table.dealer.hand.cards[1].hidden = False
         
-        # Check if all players busted - if so, dealer doesn't need to play
-        all_players_busted = all(
-            all(hand.is_bust for hand in player.hands) 
-            for player in table.active_players
-        )
-        
-        if not all_players_busted:
+        # If all players busted the dealer doesn't need to play
+        if table.live_hands > 0:
             # Dealer hits until 17 or higher (including soft 17)
             while table.dealer.should_hit:
-                if len(table.deck) == 0:
-                    table.deck = self.create_deck()
-                card = table.deck.pop()
-                table.dealer.hand.cards.append(card)
+                card = self._draw_card(table)
+                table.dealer.hand.add_card(card)
         
         # Calculate final results
         self._calculate_results(table)
     
     def _calculate_results(self, table: GameTable) -> List[GameResult]:
-        """Calculate game results and update player chips"""
+        """Calculate game results and update player chips (once per round)"""
+        results = self._round_results.get(table.id)
+        if results is not None:
+            return results
+        
         results = []
-        dealer_value = table.dealer.hand.value
-        dealer_blackjack = table.dealer.hand.is_blackjack
-        dealer_bust = table.dealer.hand.is_bust
+        dealer_hand = table.dealer.hand
+        dealer_value = dealer_hand.value
+        if dealer_value == 21 and len(dealer_hand.cards) == 2:
+            dealer_state = DEALER_BLACKJACK
+        elif dealer_value > 21:
+            dealer_state = DEALER_BUST
+        else:
+            dealer_state = DEALER_NORMAL
         
         for player in table.active_players:
             total_winnings = 0
             hand_results = []
             
             for hand in player.hands:
-                winnings = 0
+                # Score each hand once rather than per comparison
+                value = hand.value
+                chips_paid = None
                 
                 if hand.is_surrendered:
-                    # Already handled in surrender - player gets half bet back
-                    result = "surrendered"
-                    winnings = hand.bet // 2  # Half bet returned
-                elif hand.is_bust:
-                    result = "bust"
-                    winnings = 0  # Lose entire bet
-                elif hand.is_blackjack and not dealer_blackjack:
-                    # Blackjack pays 3:2
-                    winnings = hand.bet + int(hand.bet * 1.5)  # Original bet + 1.5x
-                    result = "blackjack"
-                elif hand.is_blackjack and dealer_blackjack:
-                    # Push - return original bet
-                    winnings = hand.bet
-                    result = "push"
-                elif dealer_bust and not hand.is_bust:
-                    winnings = hand.bet * 2  # Original bet + winnings
-                    result = "win"
-                elif hand.value > dealer_value:
-                    winnings = hand.bet * 2  # Original bet + winnings
-                    result = "win"
-                elif hand.value == dealer_value:
-                    winnings = hand.bet  # Push - return original bet
-                    result = "push"
+                    hand_state = HAND_SURRENDERED
+                    # Half the bet was already returned in _surrender
+                    chips_paid = 0
+                elif value > 21:
+                    hand_state = HAND_BUST
+                elif value == 21 and len(hand.cards) == 2:
+                    hand_state = HAND_BLACKJACK
                 else:
-                    result = "lose"
-                    winnings = 0  # Lose entire bet
+                    hand_state = HAND_NORMAL
+                
+                numerator, denominator, result = SETTLEMENTS[
+                    hand_state, dealer_state, (value > dealer_value) - (value < dealer_value)
+                ]
+                winnings = hand.bet * numerator // denominator
                 
                 # Update player chips
-                player.chips += winnings
+                player.chips += winnings if chips_paid is None else chips_paid
                 total_winnings += winnings
                 
                 hand_results.append({
-                    "cards": [card.dict() for card in hand.cards],
-                    "value": hand.value,
+                    "cards": [card.to_dict() for card in hand.cards],
+                    "value": value,
                     "bet": hand.bet,
                     "winnings": winnings,
                     "result": result
                 })
             
-            results.append(GameResult(
+            # Built from engine state whose types are already known, so
+            # validating every hand dict again would only copy them
+            results.append(GameResult.model_construct(
                 player_id=player.id,
                 hands=hand_results,
                 winnings=total_winnings,
                 total_bet=player.total_bet
             ))
         
+        # Later calls this round (e.g. from the websocket handler) get the
+        # same results without paying out again
+        self._round_results[table.id] = results
+        
         # Set game state to finished
-        table.state = GameState.FINISHED
+        self._set_state(table, GameState.FINISHED)
+        
+        return results
+    
+    def _unseen_counts(self, table: GameTable) -> Tuple[int, ...]:
+        """Count the cards players can't see (undealt shoe plus hole card) by value"""
+        counts = table.shoe_counts.copy()
+        for card in table.dealer.hand.cards:
+            if card.hidden:
+                counts[card.value - 1] += 1
+        return tuple(counts)
+    
+    def _dealer_probabilities(self, table: GameTable) -> Tuple[float, ...]:
+        """Get the dealer outcome odds for a dealt table"""
+        # The dealer peeks as the cards are dealt, so a hole card still face
+        # down means it's already known not to make a blackjack
+        peeked = any(card.hidden for card in table.dealer.hand.cards)
+        return dealer_probabilities(table.dealer.upcard.value, self._unseen_counts(table), peeked)
+    
+    def dealer_outcome_probabilities(self, table_id: str) -> Optional[Dict[str, float]]:
+        """Get the chance of each dealer final total given the upcard and unseen cards"""
+        table = self.tables.get(table_id)
+        if not table or not table.dealer.upcard:
+            return None
+        
+        probabilities = self._dealer_probabilities(table)
+        return dict(zip(OUTCOMES, probabilities))
+    
+    def expected_results(self, table_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Get the expected chips returned per hand if every hand stood now"""
+        # Priced from the dealer outcome distribution rather than by playing
+        # out the dealer hand, so chips and table state are left untouched
+        table = self.tables.get(table_id)
+        if not table or not table.dealer.upcard:
+            return None
+        
+        probabilities = self._dealer_probabilities(table)
+        
+        results = []
+        for player in table.active_players:
+            hand_results = []
+            for hand in player.hands:
+                value = hand.value
+                if hand.is_surrendered:
+                    expected = hand.bet // 2
+                elif value > 21:
+                    expected = 0
+                elif hand.is_blackjack:
+                    # Pays 3:2 unless the dealer also has blackjack, which the
+                    # peek has ruled out while the hole card is still down
+                    expected = hand.bet * 5 // 2
+                else:
+                    expected = probabilities[BUST] * hand.bet * 2
+                    for total, p in zip(range(17, 22), probabilities):
+                        if value > total:
+                            expected += p * hand.bet * 2
+                        elif value == total:
+                            expected += p * hand.bet
+                hand_results.append({
+                    "value": value,
+                    "bet": hand.bet,
+                    "expected_return": expected
+                })
+            results.append({"player_id": player.id, "hands": hand_results})
         
         return results
     
@@ -526,6 +743,58 @@ class BlackjackEngine:
         """Get all tables"""
         return list(self.tables.values())
     
+    def get_tables_by_state(self, *states: GameState) -> List[GameTable]:
+        """Get tables in any of the given states"""
+        return [
+            self.tables[table_id]
+            for state in states
+            for table_id in self._by_state[state]
+        ]
+    
+    def get_available_tables(self) -> List[GameTable]:
+        """Get tables that have an open seat"""
+        return [self.tables[table_id] for table_id in self._available]
+    
+    def is_available(self, table: GameTable) -> bool:
+        """Check if a table has an open seat"""
+        return table.id in self._available
+    
+    def get_table_stats(self) -> Dict[str, Any]:
+        """Get table counts from the indexes without scanning tables"""
+        total_tables = len(self.tables)
+        available_tables = len(self._available)
+        state_counts = {state: len(ids) for state, ids in self._by_state.items()}
+        return {
+            "total_tables": total_tables,
+            "available_tables": available_tables,
+            "full_tables": total_tables - available_tables,
+            "active_games": state_counts[GameState.PLAYING] + state_counts[GameState.DEALER_TURN],
+            "waiting_tables": state_counts[GameState.WAITING],
+            "total_players": self._total_players,
+            "states": {state.value: count for state, count in state_counts.items()}
+        }
+    
+    def table_summary(self, table: GameTable) -> Dict[str, Any]:
+        """Build the lightweight summary used by table listings"""
+        player_count = len(table.players)
+        return {
+            "id": table.id,
+            "name": table.name,
+            "state": table.state,
+            "player_count": player_count,
+            "max_players": table.max_players,
+            "min_bet": table.min_bet,
+            "max_bet": table.max_bet,
+            "is_full": player_count >= table.max_players
+        }
+    
+    def iter_table_summaries(self, tables: Optional[Iterable[GameTable]] = None) -> Iterator[Dict[str, Any]]:
+        """Yield summaries for the given tables (all tables by default)"""
+        if tables is None:
+            tables = self.tables.values()
+        for table in tables:
+            yield self.table_summary(table)
+    
     def reset_table(self, table_id: str) -> bool:
         """Reset table for new game"""
         if table_id not in self.tables:
@@ -537,14 +806,16 @@ class BlackjackEngine:
         for player in table.players:
             player.hands = []
             player.current_hand_index = 0
+        table.bets_placed = 0
         
         # Reset dealer
         table.dealer = Dealer()
         
         # Reset game state
-        table.state = GameState.WAITING
+        self._set_state(table, GameState.WAITING)
         table.current_player_index = 0
         
+        table.touch()
         return True
     
     def new_round(self, table_id: str) -> Tuple[bool, str]:
@@ -562,18 +833,19 @@ class BlackjackEngine:
         for player in table.players:
             player.hands = []
             player.current_hand_index = 0
+        table.bets_placed = 0
         
         # Reset dealer
         table.dealer = Dealer()
         
         # Reset game state to waiting for bets
-        table.state = GameState.WAITING
+        self._set_state(table, GameState.WAITING)
         table.current_player_index = 0
         
         # Refresh deck if needed
-        if len(table.deck) < 20:
-            table.deck = self.create_deck()
+        self._reshuffle_if_needed(table)
         
+        table.touch()
         return True, "New round started - place your bets!"
 
 # Global game engine instance
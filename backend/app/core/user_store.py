@@ -0,0 +1,166 @@
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+import itertools
+
+from app.core.config import settings
+
+class InMemoryUserStore:
+    """Process-local user storage (single worker / development)"""
+    
+    def __init__(self):
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self._id_counter = itertools.count(1)
+        
+        # Serialized user views for /users, kept in sync with users
+        self._users_view: List[Dict[str, Any]] = []
+    
+    async def get(self, username: str) -> Optional[Dict[str, Any]]:
+        """Get a user by username"""
+        return self.users.get(username)
+    
+    async def next_user_id(self) -> str:
+        """Allocate a user id that is never reused"""
+        return f"user_{next(self._id_counter)}"
+    
+    async def exists(self, username: str) -> bool:
+        """Check if a username is taken"""
+        return username in self.users
+    
+    async def add(self, user: Dict[str, Any]) -> bool:
+        """Store a user and its precomputed public view, unless the username is taken"""
+        if user["username"] in self.users:
+            return False
+        
+        self.users[user["username"]] = user
+        self._users_view.append(public_user_view(user))
+        return True
+    
+    async def set_password_hash(self, username: str, hashed_password: str):
+        """Replace a user's stored password hash"""
+        self.users[username]["hashed_password"] = hashed_password
+    
+    async def all_users(self) -> List[Dict[str, Any]]:
+        """Get the public views of all users"""
+        return self._users_view
+
+class RedisUserStore:
+    """Redis-backed user storage shared by every worker"""
+    
+    INDEX_KEY = "users:index"
+    ID_COUNTER_KEY = "users:next_id"
+    
+    def __init__(self, redis_url: str, max_connections: int = 50):
+        import redis.asyncio as redis
+        
+        self.pool = redis.ConnectionPool.from_url(
+            redis_url,
+            max_connections=max_connections,
+            decode_responses=True,
+            health_check_interval=30
+        )
+        self.redis = redis.Redis(connection_pool=self.pool)
+    
+    @staticmethod
+    def _key(username: str) -> str:
+        return f"user:{username}"
+    
+    @staticmethod
+    def _encode(user: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "id": user["id"],
+            "username": user["username"],
+            "email": user["email"] or "",
+            "hashed_password": user["hashed_password"] or "",
+            "chips": str(user["chips"]),
+            "created_at": user["created_at"].isoformat(),
+            "is_guest": "1" if user.get("is_guest") else ""
+        }
+    
+    @staticmethod
+    def _decode(data: Dict[str, str]) -> Optional[Dict[str, Any]]:
+        if not data:
+            return None
+        
+        user = {
+            "id": data["id"],
+            "username": data["username"],
+            "email": data["email"] or None,
+            "hashed_password": data["hashed_password"] or None,
+            "chips": int(data["chips"]),
+            "created_at": datetime.fromisoformat(data["created_at"])
+        }
+        if data.get("is_guest"):
+            user["is_guest"] = True
+        return user
+    
+    async def get(self, username: str) -> Optional[Dict[str, Any]]:
+        """Get a user by username"""
+        return self._decode(await self.redis.hgetall(self._key(username)))
+    
+    async def next_user_id(self) -> str:
+        """Allocate a user id that is never reused"""
+        return f"user_{await self.redis.incr(self.ID_COUNTER_KEY)}"
+    
+    async def exists(self, username: str) -> bool:
+        """Check if a username is taken"""
+        return bool(await self.redis.exists(self._key(username)))
+    
+    async def add(self, user: Dict[str, Any]) -> bool:
+        """Store a user and add it to the user index, unless the username is taken"""
+        from redis.exceptions import WatchError
+        
+        key = self._key(user["username"])
+        
+        # WATCH makes the write fail if another worker creates the same user
+        # between the existence check and EXEC
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                if await pipe.exists(key):
+                    return False
+                
+                pipe.multi()
+                pipe.hset(key, mapping=self._encode(user))
+                pipe.sadd(self.INDEX_KEY, user["username"])
+                await pipe.execute()
+            except WatchError:
+                return False
+        return True
+    
+    async def set_password_hash(self, username: str, hashed_password: str):
+        """Replace a user's stored password hash"""
+        await self.redis.hset(self._key(username), "hashed_password", hashed_password)
+    
+    async def all_users(self) -> List[Dict[str, Any]]:
+        """Get the public views of all users in a single round trip"""
+        usernames = await self.redis.smembers(self.INDEX_KEY)
+        
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for username in usernames:
+                pipe.hgetall(self._key(username))
+            results = await pipe.execute()
+        
+        return [
+            public_user_view(user)
+            for user in map(self._decode, results)
+            if user
+        ]
+
+def public_user_view(user: Dict[str, Any]) -> Dict[str, Any]:
+    """Get the fields of a user that are safe to return from the API"""
+    return {
+        "id": user["id"],
+        "username": user["username"],
+        "email": user["email"],
+        "chips": user["chips"],
+        "created_at": user["created_at"].isoformat()
+    }
+
+def create_user_store():
+    """Use Redis when configured so every worker sees the same users"""
+    if settings.REDIS_URL:
+        return RedisUserStore(settings.REDIS_URL)
+    return InMemoryUserStore()
+
+# Global user store instance
+user_store = create_user_store()
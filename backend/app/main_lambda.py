@@ -1,5 +1,7 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api import game, auth, tables
 from app.core.config import settings
@@ -7,24 +9,29 @@ from app.core.config import settings
 app = FastAPI(
     title="Blackjack API",
     description="A real-time multiplayer blackjack game API (Lambda version - no WebSockets)",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware - Updated to include S3 website domain
+# CORS middleware - the wildcard already covers the S3 website and
+# localhost origins, and explicit origins listed alongside it are never
+# consulted
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "*",  # Allow all for development
-        "http://blackjack-frontend-20250529-101344.s3-website-us-east-1.amazonaws.com",  # Your S3 website
-        "https://blackjack-frontend-20250529-101344.s3-website-us-east-1.amazonaws.com",  # HTTPS version
-        "http://localhost:3000",  # For local development
-        "https://localhost:3000"  # HTTPS local
-    ],
+    allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
     allow_headers=["*"],
 )
 
+@app.exception_handler(Exception)
+async def unhandled_exception_handler(request: Request, exc: Exception):
+    """Turn unexpected errors from any endpoint into a JSON 500 response"""
+    return ORJSONResponse({"success": False, "detail": str(exc)}, status_code=500)
+
+# Compress larger JSON payloads such as full table states
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Include API routes (REST endpoints only)
 app.include_router(auth.router, prefix="/api/auth", tags=["authentication"])
 app.include_router(game.router, prefix="/api/game", tags=["game"])
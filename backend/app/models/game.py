@@ -1,5 +1,5 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, computed_field
+from typing import List, Optional, Dict, Any, Tuple
 from enum import Enum
 import uuid
 from datetime import datetime
@@ -25,25 +25,83 @@ class CardRank(str, Enum):
     QUEEN = "Q"
     KING = "K"
 
-class Card(BaseModel):
+# Base value of each rank (Ace = 1, Face cards = 10)
+RANK_VALUES: Dict[CardRank, int] = {
+    CardRank.ACE: 1,
+    **{rank: int(rank.value) for rank in CardRank if rank.value.isdigit()},
+    CardRank.JACK: 10,
+    CardRank.QUEEN: 10,
+    CardRank.KING: 10
+}
+
+class GameModel(BaseModel):
+    """Base for the game models the engine mutates as play goes on"""
+    
+    # None of these models validate on assignment, so setting a field only
+    # has to store it. BaseModel.__setattr__ first looks the name up on the
+    # class, which for a field misses through the metaclass and costs a few
+    # microseconds on every card dealt and every counter bumped.
+    def __setattr__(self, name: str, value: Any):
+        if name in self.__pydantic_fields__:
+            self.__dict__[name] = value
+            self.__pydantic_fields_set__.add(name)
+        else:
+            super().__setattr__(name, value)
+
+class Card(GameModel):
     suit: Suit
     rank: CardRank
     hidden: bool = False
     
-    @property
-    def value(self) -> int:
-        """Get the base value of the card (Ace = 1, Face cards = 10)"""
-        if self.rank in [CardRank.JACK, CardRank.QUEEN, CardRank.KING]:
-            return 10
-        elif self.rank == CardRank.ACE:
-            return 1
-        else:
-            return int(self.rank)
+    # Derived from suit and rank once at construction so scoring and
+    # serialization work on plain ints instead of hashing enum members.
+    # value is the base value (Ace = 1, Face cards = 10); code is the
+    # card's index (0-51) ordered by suit then rank.
+    value: int = Field(default=0, exclude=True, repr=False)
+    code: int = Field(default=0, exclude=True, repr=False)
+    
+    def model_post_init(self, __context: Any):
+        """Fill in the derived value and code"""
+        self.value = RANK_VALUES[self.rank]
+        self.code = CARD_CODES[self.suit, self.rank]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the card as a JSON-ready dict, shared between all equal cards"""
+        if self.hidden:
+            return HIDDEN_CARD_DICTS[self.code]
+        return CARD_DICTS[self.code]
     
     def __str__(self):
         return f"{self.rank}{self.suit}"
 
-class Hand(BaseModel):
+# Card indexes ordered by suit then rank, matching Card.code
+CARD_CODES: Dict[Tuple[Suit, CardRank], int] = {
+    (suit, rank): code
+    for code, (suit, rank) in enumerate((suit, rank) for suit in Suit for rank in CardRank)
+}
+
+# Serialized face-up cards indexed by Card.code; treat as read-only
+CARD_DICTS: Tuple[Dict[str, Any], ...] = tuple(
+    {"suit": suit.value, "rank": rank.value, "value": RANK_VALUES[rank], "hidden": False}
+    for suit in Suit
+    for rank in CardRank
+)
+
+# The same, for face-down cards
+HIDDEN_CARD_DICTS: Tuple[Dict[str, Any], ...] = tuple(
+    {**card_dict, "hidden": True} for card_dict in CARD_DICTS
+)
+
+# One shared instance per distinct card, indexed by Card.code. Shoes hold
+# references to these, so they must never be mutated; copy a card to
+# change it (e.g. to hide the dealer's hole card).
+CARD_POOL: Tuple[Card, ...] = tuple(
+    Card(suit=suit, rank=rank)
+    for suit in Suit
+    for rank in CardRank
+)
+
+class Hand(GameModel):
     cards: List[Card] = Field(default_factory=list)
     bet: int = 0
     is_split: bool = False
@@ -51,17 +109,48 @@ class Hand(BaseModel):
     is_surrendered: bool = False
     is_finished: bool = False
     
+    # Running totals kept up to date by the card methods below, so scoring
+    # doesn't rescan the cards. hard_total counts aces as 1. The engine
+    # must go through add_card/set_cards/pop_card rather than mutating
+    # cards directly.
+    hard_total: int = Field(default=0, exclude=True, repr=False)
+    aces: int = Field(default=0, exclude=True, repr=False)
+    
+    def model_post_init(self, __context: Any):
+        """Compute the running totals for the initial cards"""
+        if self.cards:
+            self.set_cards(self.cards)
+    
+    def add_card(self, card: Card):
+        """Add a card and update the running totals"""
+        self.cards.append(card)
+        self.hard_total += card.value
+        if card.value == 1:
+            self.aces += 1
+    
+    def set_cards(self, cards: List[Card]):
+        """Replace the hand's cards and recompute the running totals"""
+        self.cards = cards
+        self.hard_total = sum(card.value for card in cards)
+        self.aces = sum(1 for card in cards if card.value == 1)
+    
+    def pop_card(self) -> Card:
+        """Remove the last card and update the running totals"""
+        card = self.cards.pop()
+        self.hard_total -= card.value
+        if card.value == 1:
+            self.aces -= 1
+        return card
+    
     @property
     def value(self) -> int:
         """Calculate the best possible value of the hand"""
-        total = sum(card.value for card in self.cards)
-        aces = sum(1 for card in self.cards if card.rank == CardRank.ACE)
+        total = self.hard_total
         
-        # Add 10 for each ace that can be counted as 11 without busting
-        while aces > 0 and total + 10 <= 21:
+        # At most one ace can count as 11 without busting
+        if self.aces and total + 10 <= 21:
             total += 10
-            aces -= 1
-            
+        
         return total
     
     @property
@@ -72,7 +161,8 @@ class Hand(BaseModel):
     @property
     def is_bust(self) -> bool:
         """Check if hand is bust (over 21)"""
-        return self.value > 21
+        # Aces only count as 11 when that doesn't bust, so the hard total decides
+        return self.hard_total > 21
     
     @property
     def can_split(self) -> bool:
@@ -102,7 +192,7 @@ class PlayerAction(str, Enum):
     SURRENDER = "surrender"
     INSURANCE = "insurance"
 
-class Player(BaseModel):
+class Player(GameModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
     chips: int = 1000
@@ -123,8 +213,13 @@ class Player(BaseModel):
     def total_bet(self) -> int:
         """Get total bet across all hands"""
         return sum(hand.bet for hand in self.hands)
+    
+    @property
+    def has_bet(self) -> bool:
+        """Check if the player has a bet on their first hand"""
+        return bool(self.hands) and self.hands[0].bet > 0
 
-class Dealer(BaseModel):
+class Dealer(GameModel):
     hand: Hand = Field(default_factory=Hand)
     
     @property
@@ -137,17 +232,13 @@ class Dealer(BaseModel):
     @property
     def should_hit(self) -> bool:
         """Dealer hits on soft 17"""
-        value = self.hand.value
-        if value < 17:
-            return True
-        if value == 17:
-            # Check for soft 17 (Ace counted as 11)
-            total = sum(card.value for card in self.hand.cards)
-            aces = sum(1 for card in self.hand.cards if card.rank == CardRank.ACE)
-            return total + 10 == 17 and aces > 0
-        return False
-
-class GameTable(BaseModel):
+        total = self.hand.hard_total
+        if self.hand.aces and total + 10 <= 21:
+            # Soft hand - hit on soft 17 (Ace counted as 11)
+            return total + 10 <= 17
+        return total < 17
+
+class GameTable(GameModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     name: str
     min_bet: int = 10
@@ -155,12 +246,113 @@ class GameTable(BaseModel):
     max_players: int = 6
     players: List[Player] = Field(default_factory=list)
     dealer: Dealer = Field(default_factory=Dealer)
-    deck: List[Card] = Field(default_factory=list)
+    # Shoe as card codes (see Card.code, dealt as CARD_POOL cards); deck_pos
+    # is the next card to deal
+    shoe: bytes = Field(default=b"", exclude=True, repr=False)
+    deck_pos: int = Field(default=0, exclude=True)
+    
+    # Undealt cards left in the shoe by value (index 0 = ace, 9 = ten-valued)
+    shoe_counts: List[int] = Field(default_factory=lambda: [0] * 10, exclude=True, repr=False)
     state: GameState = GameState.WAITING
     current_player_index: int = 0
+    
+    # Incremented on every applied player action; clients echo it back so
+    # actions based on a stale view are rejected instead of applied
+    session_seq: int = 0
+    
+    # Hands still to be played this round, so the end of the players' turns
+    # is detected without walking every hand
+    unfinished_hands: int = Field(default=0, exclude=True)
+    
+    # Hands that haven't bust this round, so the dealer can skip drawing
+    # when every player has bust
+    live_hands: int = Field(default=0, exclude=True, repr=False)
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     
+    # Engine bookkeeping below is kept in excluded fields rather than
+    # PrivateAttr: private attributes are read through BaseModel.__getattr__,
+    # which costs microseconds per access on these hot paths.
+    
+    # Bumped on every mutation so serialized views can be reused
+    version: int = Field(default=0, exclude=True, repr=False)
+    dict_cache: Optional[Dict[str, Any]] = Field(default=None, exclude=True, repr=False)
+    dict_cache_version: int = Field(default=-1, exclude=True, repr=False)
+    
+    # Players by id and by name, kept in sync by add_player/remove_player
+    players_by_id: Dict[str, Player] = Field(default_factory=dict, exclude=True, repr=False)
+    players_by_name: Dict[str, Player] = Field(default_factory=dict, exclude=True, repr=False)
+    
+    # Occupied seats, bit (seat_position - 1) set per seated player
+    seat_bitmap: int = Field(default=0, exclude=True, repr=False)
+    
+    # Active players, rebuilt only after the seating changes. Player.is_active
+    # is fixed once a player is seated; changing it mid-round would also
+    # have to adjust the engine's bets_placed and hand counters.
+    active_players_cache: Optional[List[Player]] = Field(default=None, exclude=True, repr=False)
+    
+    # Active players with a bet placed, so the engine can tell when everyone
+    # has bet without scanning. The engine resets it when it clears hands.
+    bets_placed: int = Field(default=0, exclude=True, repr=False)
+    
+    def model_post_init(self, __context: Any):
+        """Index any players passed in at construction"""
+        self.players_by_id = {player.id: player for player in self.players}
+        for player in self.players:
+            self.players_by_name.setdefault(player.name, player)
+            self.seat_bitmap |= 1 << (player.seat_position - 1)
+            if player.is_active and player.has_bet:
+                self.bets_placed += 1
+    
+    def touch(self):
+        """Mark the table as modified"""
+        self.version += 1
+        self.updated_at = datetime.utcnow()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the JSON-ready table, reused until the table is modified"""
+        if self.dict_cache_version != self.version:
+            self.dict_cache = self.model_dump(mode="json")
+            self.dict_cache_version = self.version
+        return self.dict_cache
+    
+    def get_player(self, player_id: str) -> Optional[Player]:
+        """Get a seated player by id"""
+        return self.players_by_id.get(player_id)
+    
+    def get_player_by_name(self, name: str) -> Optional[Player]:
+        """Get a seated player by name"""
+        return self.players_by_name.get(name)
+    
+    def add_player(self, player: Player):
+        """Seat a player"""
+        self.players.append(player)
+        self.players_by_id[player.id] = player
+        self.players_by_name.setdefault(player.name, player)
+        self.seat_bitmap |= 1 << (player.seat_position - 1)
+        self.active_players_cache = None
+        if player.is_active and player.has_bet:
+            self.bets_placed += 1
+    
+    def remove_player(self, player_id: str) -> Optional[Player]:
+        """Remove a player by id, returning them if they were seated"""
+        player = self.players_by_id.pop(player_id, None)
+        if player is not None:
+            self.players = [p for p in self.players if p is not player]
+            if self.players_by_name.get(player.name) is player:
+                del self.players_by_name[player.name]
+            self.seat_bitmap &= ~(1 << (player.seat_position - 1))
+            self.active_players_cache = None
+            if player.is_active and player.has_bet:
+                self.bets_placed -= 1
+        return player
+    
+    @computed_field
+    @property
+    def deck_count(self) -> int:
+        """Get the number of cards left in the shoe"""
+        return len(self.shoe) - self.deck_pos
+    
     @property
     def current_player(self) -> Optional[Player]:
         """Get the current active player"""
@@ -175,8 +367,10 @@ class GameTable(BaseModel):
     
     @property
     def active_players(self) -> List[Player]:
-        """Get list of active players"""
-        return [p for p in self.players if p.is_active]
+        """Get list of active players (shared; don't modify)"""
+        if self.active_players_cache is None:
+            self.active_players_cache = [p for p in self.players if p.is_active]
+        return self.active_players_cache
 
 class GameAction(BaseModel):
     player_id: str
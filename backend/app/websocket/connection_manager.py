@@ -1,12 +1,38 @@
 from fastapi import WebSocket
-from typing import Dict, List, Set
-import json
+from typing import Dict, Iterable, List, Optional, Set
+from dataclasses import dataclass
 import asyncio
+import logging
+import orjson
 from datetime import datetime
 
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+def encode_message(message: dict) -> bytes:
+    """Serialize a message as UTF-8 JSON for a binary frame"""
+    # Sent as bytes so the JSON isn't decoded here only to be re-encoded by
+    # the server; clients read frames with binaryType = "arraybuffer"
+    return orjson.dumps(message)
+
+@dataclass(slots=True)
+class TableConnection:
+    """The table a websocket is connected to and the player using it, if known"""
+    table_id: str
+    player_id: Optional[str] = None
+
 class ConnectionManager:
     """Manages WebSocket connections for real-time communication"""
     
+    __slots__ = (
+        "table_connections",
+        "chat_connections",
+        "player_connections",
+        "connections",
+        "chat_tables"
+    )
+    
     def __init__(self):
         # Table connections: table_id -> set of websockets
         self.table_connections: Dict[str, Set[WebSocket]] = {}
@@ -17,8 +43,12 @@ class ConnectionManager:
         # Player to websocket mapping
         self.player_connections: Dict[str, WebSocket] = {}
         
-        # Websocket to player mapping
-        self.websocket_players: Dict[WebSocket, str] = {}
+        # Table websocket -> its table and player, so a connection can be
+        # dropped without searching every table
+        self.connections: Dict[WebSocket, TableConnection] = {}
+        
+        # Chat websocket -> its table, for the same reason
+        self.chat_tables: Dict[WebSocket, str] = {}
     
     async def connect(self, websocket: WebSocket, table_id: str, player_id: str = None):
         """Connect a websocket to a table"""
@@ -28,12 +58,17 @@ class ConnectionManager:
             self.table_connections[table_id] = set()
         
         self.table_connections[table_id].add(websocket)
+        self.connections[websocket] = TableConnection(table_id)
         
         if player_id:
-            self.player_connections[player_id] = websocket
-            self.websocket_players[websocket] = player_id
-        
-        print(f"WebSocket connected to table {table_id}")
+            self.set_player(websocket, player_id)
+    
+    def set_player(self, websocket: WebSocket, player_id: str):
+        """Record which player is using a websocket"""
+        connection = self.connections.get(websocket)
+        if connection is not None:
+            connection.player_id = player_id
+        self.player_connections[player_id] = websocket
     
     async def connect_chat(self, websocket: WebSocket, table_id: str):
         """Connect a websocket to table chat"""
@@ -43,96 +78,115 @@ class ConnectionManager:
             self.chat_connections[table_id] = set()
         
         self.chat_connections[table_id].add(websocket)
-        print(f"Chat WebSocket connected to table {table_id}")
+        self.chat_tables[websocket] = table_id
     
     async def disconnect(self, websocket: WebSocket, table_id: str):
         """Disconnect a websocket from a table"""
-        if table_id in self.table_connections:
-            self.table_connections[table_id].discard(websocket)
-            
-            # Clean up empty table connections
-            if not self.table_connections[table_id]:
-                del self.table_connections[table_id]
-        
-        # Clean up player mappings
-        if websocket in self.websocket_players:
-            player_id = self.websocket_players[websocket]
-            del self.websocket_players[websocket]
-            if player_id in self.player_connections:
-                del self.player_connections[player_id]
-        
-        print(f"WebSocket disconnected from table {table_id}")
+        self._forget_connection(websocket, table_id)
+        logger.debug("WebSocket disconnected from table %s", table_id)
     
     async def disconnect_chat(self, websocket: WebSocket, table_id: str):
         """Disconnect a websocket from table chat"""
-        if table_id in self.chat_connections:
-            self.chat_connections[table_id].discard(websocket)
-            
-            # Clean up empty chat connections
-            if not self.chat_connections[table_id]:
-                del self.chat_connections[table_id]
-        
-        print(f"Chat WebSocket disconnected from table {table_id}")
+        self._forget_chat_connection(websocket, table_id)
+        logger.debug("Chat WebSocket disconnected from table %s", table_id)
     
     async def send_to_player(self, player_id: str, message: dict):
         """Send message to a specific player"""
         if player_id in self.player_connections:
             websocket = self.player_connections[player_id]
             try:
-                await websocket.send_text(json.dumps(message))
+                await websocket.send_bytes(encode_message(message))
             except Exception as e:
-                print(f"Error sending to player {player_id}: {e}")
+                logger.warning("Error sending to player %s: %s", player_id, e)
                 # Remove broken connection
                 await self._remove_broken_connection(websocket)
     
+    async def send_to_players(self, player_ids: Iterable[str], message: dict):
+        """Send the same message to several players concurrently"""
+        # Serialized once and shared by every recipient
+        payload = encode_message(message)
+        recipients = [
+            (player_id, self.player_connections[player_id])
+            for player_id in player_ids
+            if player_id in self.player_connections
+        ]
+        results = await asyncio.gather(
+            *(websocket.send_bytes(payload) for _, websocket in recipients),
+            return_exceptions=True
+        )
+        
+        # Remove broken connections
+        for (player_id, websocket), result in zip(recipients, results):
+            if isinstance(result, Exception):
+                logger.warning("Error sending to player %s: %s", player_id, result)
+                await self._remove_broken_connection(websocket)
+    
     async def broadcast_to_table(self, table_id: str, message: dict):
         """Broadcast message to all connections in a table"""
         if table_id not in self.table_connections:
             return
         
-        # Add timestamp to message
-        message["timestamp"] = datetime.utcnow().isoformat()
-        
-        broken_connections = []
+        # Add timestamp to message (orjson writes datetimes in ISO format)
+        message["timestamp"] = datetime.utcnow()
         
-        for websocket in self.table_connections[table_id].copy():
-            try:
-                await websocket.send_text(json.dumps(message))
-            except Exception as e:
-                print(f"Error broadcasting to table {table_id}: {e}")
-                broken_connections.append(websocket)
+        # Serialized once and shared by every connection
+        await self._send_payload_to_table(table_id, encode_message(message))
+    
+    async def _send_payload_to_table(self, table_id: str, payload: bytes):
+        """Send a serialized message to every connection in a table"""
+        # Sent to all of them concurrently so one slow client doesn't hold
+        # up the rest
+        websockets = list(self.table_connections.get(table_id, ()))
+        results = await asyncio.gather(
+            *(websocket.send_bytes(payload) for websocket in websockets),
+            return_exceptions=True
+        )
         
         # Remove broken connections
-        for websocket in broken_connections:
-            await self._remove_broken_connection(websocket, table_id)
+        for websocket, result in zip(websockets, results):
+            if isinstance(result, Exception):
+                logger.warning("Error broadcasting to table %s: %s", table_id, result)
+                await self._remove_broken_connection(websocket, table_id)
     
     async def broadcast_chat_to_table(self, table_id: str, message: dict):
         """Broadcast chat message to all chat connections in a table"""
         if table_id not in self.chat_connections:
             return
         
-        # Add timestamp to message
-        message["timestamp"] = datetime.utcnow().isoformat()
-        
-        broken_connections = []
+        # Add timestamp to message (orjson writes datetimes in ISO format)
+        message["timestamp"] = datetime.utcnow()
         
-        for websocket in self.chat_connections[table_id].copy():
-            try:
-                await websocket.send_text(json.dumps(message))
-            except Exception as e:
-                print(f"Error broadcasting chat to table {table_id}: {e}")
-                broken_connections.append(websocket)
+        # Serialized once and shared by every connection
+        await self._send_payload_to_chat(table_id, encode_message(message))
+    
+    async def _send_payload_to_chat(self, table_id: str, payload: bytes):
+        """Send a serialized message to every chat connection in a table"""
+        # Sent to all of them concurrently so one slow client doesn't hold
+        # up the rest
+        websockets = list(self.chat_connections.get(table_id, ()))
+        results = await asyncio.gather(
+            *(websocket.send_bytes(payload) for websocket in websockets),
+            return_exceptions=True
+        )
         
         # Remove broken connections
-        for websocket in broken_connections:
-            await self._remove_broken_chat_connection(websocket, table_id)
+        for websocket, result in zip(websockets, results):
+            if isinstance(result, Exception):
+                logger.warning("Error broadcasting chat to table %s: %s", table_id, result)
+                await self._remove_broken_chat_connection(websocket, table_id)
     
     async def broadcast_to_all_tables(self, message: dict):
         """Broadcast message to all connected tables"""
-        message["timestamp"] = datetime.utcnow().isoformat()
-        
-        for table_id in list(self.table_connections.keys()):
-            await self.broadcast_to_table(table_id, message)
+        message["timestamp"] = datetime.utcnow()
+        await self._send_payload_to_all_tables(encode_message(message))
+    
+    async def _send_payload_to_all_tables(self, payload: bytes):
+        """Send a serialized message to every connected table"""
+        # Every table gets the same payload, sent to all tables concurrently
+        await asyncio.gather(*(
+            self._send_payload_to_table(table_id, payload)
+            for table_id in list(self.table_connections)
+        ))
     
     async def get_table_connection_count(self, table_id: str) -> int:
         """Get number of connections for a table"""
@@ -140,36 +194,46 @@ class ConnectionManager:
     
     async def get_total_connections(self) -> int:
         """Get total number of connections"""
-        total = 0
-        for connections in self.table_connections.values():
-            total += len(connections)
-        return total
+        return len(self.connections)
     
     async def _remove_broken_connection(self, websocket: WebSocket, table_id: str = None):
         """Remove a broken websocket connection"""
-        # Remove from table connections
-        if table_id and table_id in self.table_connections:
-            self.table_connections[table_id].discard(websocket)
-        else:
-            # Search all tables
-            for tid, connections in self.table_connections.items():
-                connections.discard(websocket)
-        
-        # Remove from player mappings
-        if websocket in self.websocket_players:
-            player_id = self.websocket_players[websocket]
-            del self.websocket_players[websocket]
-            if player_id in self.player_connections:
+        self._forget_connection(websocket, table_id)
+    
+    def _forget_connection(self, websocket: WebSocket, table_id: Optional[str] = None):
+        """Drop a table websocket and its player mapping"""
+        connection = self.connections.pop(websocket, None)
+        if connection is not None:
+            table_id = connection.table_id
+            
+            # The player may already have reconnected on another websocket
+            player_id = connection.player_id
+            if player_id is not None and self.player_connections.get(player_id) is websocket:
                 del self.player_connections[player_id]
+        
+        connections = self.table_connections.get(table_id)
+        if connections is not None:
+            connections.discard(websocket)
+            
+            # Clean up empty table connections
+            if not connections:
+                del self.table_connections[table_id]
     
     async def _remove_broken_chat_connection(self, websocket: WebSocket, table_id: str = None):
         """Remove a broken chat websocket connection"""
-        if table_id and table_id in self.chat_connections:
-            self.chat_connections[table_id].discard(websocket)
-        else:
-            # Search all tables
-            for tid, connections in self.chat_connections.items():
-                connections.discard(websocket)
+        self._forget_chat_connection(websocket, table_id)
+    
+    def _forget_chat_connection(self, websocket: WebSocket, table_id: Optional[str] = None):
+        """Drop a chat websocket"""
+        table_id = self.chat_tables.pop(websocket, table_id)
+        
+        connections = self.chat_connections.get(table_id)
+        if connections is not None:
+            connections.discard(websocket)
+            
+            # Clean up empty chat connections
+            if not connections:
+                del self.chat_connections[table_id]
     
     def get_connected_tables(self) -> List[str]:
         """Get list of table IDs with active connections"""
@@ -177,4 +241,167 @@ class ConnectionManager:
     
     def is_player_connected(self, player_id: str) -> bool:
         """Check if a player is connected"""
-        return player_id in self.player_connections 
\ No newline at end of file
+        return player_id in self.player_connections
+
+
+class RedisConnectionManager(ConnectionManager):
+    """Relays broadcasts through Redis pub/sub so every worker's sockets get them"""
+    
+    TABLE_CHANNEL = "table:"
+    CHAT_CHANNEL = "chat:"
+    ALL_TABLES_CHANNEL = "tables:all"
+    
+    # Seconds to wait before resubscribing after the listener loses Redis
+    RECONNECT_DELAY = 1.0
+    
+    __slots__ = ("redis", "pubsub", "channels", "_listener", "_subscription_lock")
+    
+    def __init__(self, redis_url: str):
+        import redis.asyncio as redis
+        
+        super().__init__()
+        self.redis = redis.Redis.from_url(redis_url, health_check_interval=30)
+        self.pubsub = self.redis.pubsub()
+        
+        # Channels this worker listens on: one per table (and table chat)
+        # with local sockets, plus the all-tables channel
+        self.channels: Set[str] = set()
+        self._listener: Optional[asyncio.Task] = None
+        
+        # Held while (un)subscribing, so concurrent connects start only one
+        # listener and a disconnect can't drop a channel a new socket needs
+        self._subscription_lock = asyncio.Lock()
+    
+    async def connect(self, websocket: WebSocket, table_id: str, player_id: str = None):
+        """Connect a websocket to a table and listen for that table's broadcasts"""
+        await super().connect(websocket, table_id, player_id)
+        await self._subscribe(self.TABLE_CHANNEL + table_id)
+    
+    async def connect_chat(self, websocket: WebSocket, table_id: str):
+        """Connect a websocket to table chat and listen for that table's chat"""
+        await super().connect_chat(websocket, table_id)
+        await self._subscribe(self.CHAT_CHANNEL + table_id)
+    
+    async def disconnect(self, websocket: WebSocket, table_id: str):
+        """Disconnect a websocket from a table"""
+        table_id = self._connection_table(websocket, table_id)
+        await super().disconnect(websocket, table_id)
+        await self._release(self.TABLE_CHANNEL, table_id, self.table_connections)
+    
+    async def disconnect_chat(self, websocket: WebSocket, table_id: str):
+        """Disconnect a websocket from table chat"""
+        table_id = self.chat_tables.get(websocket, table_id)
+        await super().disconnect_chat(websocket, table_id)
+        await self._release(self.CHAT_CHANNEL, table_id, self.chat_connections)
+    
+    async def broadcast_to_table(self, table_id: str, message: dict):
+        """Publish a message for every worker to send to its sockets in a table"""
+        message["timestamp"] = datetime.utcnow()
+        await self.redis.publish(self.TABLE_CHANNEL + table_id, encode_message(message))
+    
+    async def broadcast_chat_to_table(self, table_id: str, message: dict):
+        """Publish a chat message for every worker to send to its chat sockets"""
+        message["timestamp"] = datetime.utcnow()
+        await self.redis.publish(self.CHAT_CHANNEL + table_id, encode_message(message))
+    
+    async def broadcast_to_all_tables(self, message: dict):
+        """Publish a message for every worker to send to all its tables"""
+        message["timestamp"] = datetime.utcnow()
+        await self.redis.publish(self.ALL_TABLES_CHANNEL, encode_message(message))
+    
+    async def _remove_broken_connection(self, websocket: WebSocket, table_id: str = None):
+        """Remove a broken websocket connection"""
+        table_id = self._connection_table(websocket, table_id)
+        await super()._remove_broken_connection(websocket, table_id)
+        await self._release(self.TABLE_CHANNEL, table_id, self.table_connections)
+    
+    async def _remove_broken_chat_connection(self, websocket: WebSocket, table_id: str = None):
+        """Remove a broken chat websocket connection"""
+        table_id = self.chat_tables.get(websocket, table_id)
+        await super()._remove_broken_chat_connection(websocket, table_id)
+        await self._release(self.CHAT_CHANNEL, table_id, self.chat_connections)
+    
+    def _connection_table(self, websocket: WebSocket, table_id: Optional[str]) -> Optional[str]:
+        connection = self.connections.get(websocket)
+        return connection.table_id if connection is not None else table_id
+    
+    async def _subscribe(self, channel: str):
+        """Start listening on a channel, and start the listener if needed"""
+        if channel in self.channels:
+            return
+        
+        async with self._subscription_lock:
+            if channel in self.channels:
+                return
+            
+            if self._listener is None:
+                # The all-tables channel stays subscribed so the listener
+                # keeps running while no table has local sockets
+                await self.pubsub.subscribe(self.ALL_TABLES_CHANNEL, channel)
+                self.channels.add(self.ALL_TABLES_CHANNEL)
+                self._listener = asyncio.create_task(self._listen())
+            else:
+                await self.pubsub.subscribe(channel)
+            self.channels.add(channel)
+    
+    async def _release(self, prefix: str, table_id: Optional[str], connections: Dict[str, Set[WebSocket]]):
+        """Stop listening on a table's channel once it has no local sockets"""
+        if table_id is None:
+            return
+        
+        channel = prefix + table_id
+        async with self._subscription_lock:
+            # Checked under the lock, as a socket may have joined meanwhile
+            if table_id in connections or channel not in self.channels:
+                return
+            self.channels.discard(channel)
+            await self.pubsub.unsubscribe(channel)
+    
+    async def _listen(self):
+        """Send each published message to this worker's sockets, resubscribing if Redis drops"""
+        while True:
+            try:
+                async for message in self.pubsub.listen():
+                    if message["type"] == "message":
+                        await self._relay(message["channel"].decode(), message["data"])
+            except Exception as e:
+                logger.warning("Lost Redis pub/sub connection: %s", e)
+            
+            await asyncio.sleep(self.RECONNECT_DELAY)
+            try:
+                async with self._subscription_lock:
+                    await self.pubsub.subscribe(*self.channels)
+            except Exception as e:
+                logger.warning("Error resubscribing to Redis pub/sub: %s", e)
+    
+    async def _relay(self, channel: str, payload: bytes):
+        """Send a published payload to the local sockets its channel covers"""
+        try:
+            if channel == self.ALL_TABLES_CHANNEL:
+                await self._send_payload_to_all_tables(payload)
+            elif channel.startswith(self.TABLE_CHANNEL):
+                await self._send_payload_to_table(channel[len(self.TABLE_CHANNEL):], payload)
+            elif channel.startswith(self.CHAT_CHANNEL):
+                await self._send_payload_to_chat(channel[len(self.CHAT_CHANNEL):], payload)
+        except Exception as e:
+            logger.warning("Error relaying broadcast from %s: %s", channel, e)
+    
+    async def close(self):
+        """Stop listening and close the Redis connections"""
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        self.channels.clear()
+        await self.pubsub.aclose()
+        await self.redis.aclose()
+
+
+def create_connection_manager() -> ConnectionManager:
+    """Use Redis when configured so broadcasts reach sockets on every worker"""
+    if settings.REDIS_URL:
+        return RedisConnectionManager(settings.REDIS_URL)
+    return ConnectionManager()
+
+
+# Global connection manager instance
+connection_manager = create_connection_manager()
@@ -1,43 +1,51 @@
 from fastapi import WebSocket
-from typing import Dict, Any
-import json
+from typing import Dict, Any, Optional, Tuple
 from datetime import datetime
 import asyncio
+import functools
+import logging
 
-from app.websocket.connection_manager import ConnectionManager
+from app.websocket.connection_manager import ConnectionManager, connection_manager, encode_message
 from app.core.game_engine import game_engine
 from app.models.game import PlayerAction, GameState
 
+logger = logging.getLogger(__name__)
+
+# Placeholder sent in place of the dealer's hole card; treat as read-only
+HIDDEN_CARD = {"suit": "hidden", "rank": "?", "value": 0, "hidden": True}
+
+@functools.lru_cache(maxsize=128)
+def _error_prefix(message: str) -> bytes:
+    """Serialize an error message up to where its timestamp goes"""
+    # Cached on the message alone; the timestamp is appended per send
+    return encode_message({"type": "error", "message": message})[:-1] + b',"timestamp":'
+
 class GameHandler:
     """Handles WebSocket game messages and coordinates with game engine"""
     
+    __slots__ = ("connection_manager", "_table_states", "_round_timers")
+    
     def __init__(self, connection_manager: ConnectionManager):
         self.connection_manager = connection_manager
+        
+        # Serialized table states by table ID, as (table version, state), so
+        # repeated broadcasts of an unchanged table reuse one dict
+        self._table_states: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        
+        # Pending automatic new rounds by table ID
+        self._round_timers: Dict[str, asyncio.Task] = {}
     
     async def handle_message(self, table_id: str, websocket: WebSocket, message: Dict[str, Any]):
         """Handle incoming WebSocket message"""
         message_type = message.get("type")
         
-        if message_type == "join_table":
-            await self._handle_join_table(table_id, websocket, message)
-        elif message_type == "leave_table":
-            await self._handle_leave_table(table_id, websocket, message)
-        elif message_type == "place_bet":
-            await self._handle_place_bet(table_id, websocket, message)
-        elif message_type == "start_game":
-            await self._handle_start_game(table_id, websocket, message)
-        elif message_type == "player_action":
-            await self._handle_player_action(table_id, websocket, message)
-        elif message_type == "get_table_state":
-            await self._handle_get_table_state(table_id, websocket, message)
-        elif message_type == "reset_table":
-            await self._handle_reset_table(table_id, websocket, message)
-        elif message_type == "new_round":
-            await self._handle_new_round(table_id, websocket, message)
-        elif message_type == "chat_message":
-            await self._handle_chat_message(table_id, websocket, message)
-        else:
+        # Clients can send any JSON value here, including unhashable ones
+        handler = self._MESSAGE_HANDLERS.get(message_type) if isinstance(message_type, str) else None
+        if handler is None:
             await self._send_error(websocket, f"Unknown message type: {message_type}")
+            return
+        
+        await handler(self, table_id, websocket, message)
     
     async def _handle_join_table(self, table_id: str, websocket: WebSocket, message: Dict[str, Any]):
         """Handle player joining table"""
@@ -58,14 +66,14 @@ class GameHandler:
         
         if success:
             # Update connection manager with player ID
-            self.connection_manager.player_connections[player.id] = websocket
-            self.connection_manager.websocket_players[websocket] = player.id
+            self.connection_manager.set_player(websocket, player.id)
+            player_dict = player.model_dump()
             
             # Send success response to player
-            await websocket.send_text(json.dumps({
+            await websocket.send_bytes(encode_message({
                 "type": "join_table_response",
                 "success": True,
-                "player": player.dict(),
+                "player": player_dict,
                 "message": msg
             }))
             
@@ -74,12 +82,12 @@ class GameHandler:
                 # Broadcast to all players at table
                 await self.connection_manager.broadcast_to_table(table_id, {
                     "type": "player_joined",
-                    "player": player.dict(),
+                    "player": player_dict,
                     "table_state": self._get_table_state_dict(table)
                 })
             else:
                 # Just send current table state to the reconnecting player
-                await websocket.send_text(json.dumps({
+                await websocket.send_bytes(encode_message({
                     "type": "table_state",
                     "table_state": self._get_table_state_dict(table)
                 }))
@@ -100,7 +108,7 @@ class GameHandler:
             table = game_engine.get_table(table_id)
             
             # Send response to leaving player
-            await websocket.send_text(json.dumps({
+            await websocket.send_bytes(encode_message({
                 "type": "leave_table_response",
                 "success": True,
                 "message": "Left table successfully"
@@ -134,7 +142,7 @@ class GameHandler:
             table = game_engine.get_table(table_id)
             
             # Send response to player
-            await websocket.send_text(json.dumps({
+            await websocket.send_bytes(encode_message({
                 "type": "place_bet_response",
                 "success": True,
                 "message": msg,
@@ -149,21 +157,25 @@ class GameHandler:
                 "table_state": self._get_table_state_dict(table)
             })
             
-            # If game auto-started, broadcast game start
-            if was_waiting and table.state == "playing":
+            # If game auto-started, broadcast game start. A dealer blackjack
+            # settles the round as it's dealt, so it may already be finished.
+            if was_waiting and table.state in (GameState.PLAYING, GameState.FINISHED):
                 await self.connection_manager.broadcast_to_table(table_id, {
                     "type": "game_started",
                     "message": "Game started! Cards have been dealt.",
                     "table_state": self._get_table_state_dict(table)
                 })
                 
-                # Send individual player views (hide dealer's hole card)
-                for player in table.players:
-                    player_view = self._get_player_view(table, player.id)
-                    await self.connection_manager.send_to_player(player.id, {
-                        "type": "cards_dealt",
-                        "table_state": player_view
-                    })
+                # Send individual player views (hide dealer's hole card). Every
+                # seated player sees the same view, so it's built once.
+                player_view = self._get_player_view(table)
+                await self.connection_manager.send_to_players(
+                    [player.id for player in table.players],
+                    {"type": "cards_dealt", "table_state": player_view}
+                )
+                
+                if table.state == GameState.FINISHED:
+                    await self._handle_game_finished(table_id, table)
         else:
             await self._send_error(websocket, msg)
     
@@ -181,13 +193,17 @@ class GameHandler:
                 "table_state": self._get_table_state_dict(table)
             })
             
-            # Send individual hands to each player (hide other players' cards if needed)
-            for player in table.players:
-                player_view = self._get_player_view(table, player.id)
-                await self.connection_manager.send_to_player(player.id, {
-                    "type": "game_state_update",
-                    "table_state": player_view
-                })
+            # Send individual hands to each player (hide other players' cards if needed).
+            # Every seated player sees the same view, so it's built once.
+            player_view = self._get_player_view(table)
+            await self.connection_manager.send_to_players(
+                [player.id for player in table.players],
+                {"type": "game_state_update", "table_state": player_view}
+            )
+            
+            # Blackjacks can settle the round as soon as it's dealt
+            if table.state == GameState.FINISHED:
+                await self._handle_game_finished(table_id, table)
         else:
             await self._send_error(websocket, msg)
     
@@ -196,6 +212,7 @@ class GameHandler:
         player_id = message.get("player_id")
         action_str = message.get("action")
         hand_index = message.get("hand_index", 0)
+        client_seq = message.get("seq")
         
         if not player_id or not action_str:
             await self._send_error(websocket, "Player ID and action are required")
@@ -207,13 +224,13 @@ class GameHandler:
             await self._send_error(websocket, f"Invalid action: {action_str}")
             return
         
-        success, msg, result = game_engine.player_action(table_id, player_id, action, hand_index)
+        success, msg, result = game_engine.player_action(table_id, player_id, action, hand_index, client_seq)
         
         if success:
             table = game_engine.get_table(table_id)
             
             # Send action result to player
-            await websocket.send_text(json.dumps({
+            await websocket.send_bytes(encode_message({
                 "type": "player_action_response",
                 "success": True,
                 "action": action_str,
@@ -234,6 +251,14 @@ class GameHandler:
             # If game is finished, send results
             if table.state == GameState.FINISHED:
                 await self._handle_game_finished(table_id, table)
+        elif msg == "RESYNC":
+            # Client acted on a stale view; send it the current state to retry from
+            table = game_engine.get_table(table_id)
+            await websocket.send_bytes(encode_message({
+                "type": "resync",
+                "current_seq": result["current_seq"],
+                "table_state": self._get_table_state_dict(table)
+            }))
         else:
             await self._send_error(websocket, msg)
     
@@ -246,13 +271,13 @@ class GameHandler:
             if player_id:
                 # Send player-specific view
                 player_view = self._get_player_view(table, player_id)
-                await websocket.send_text(json.dumps({
+                await websocket.send_bytes(encode_message({
                     "type": "table_state",
                     "table_state": player_view
                 }))
             else:
                 # Send general table state
-                await websocket.send_text(json.dumps({
+                await websocket.send_bytes(encode_message({
                     "type": "table_state",
                     "table_state": self._get_table_state_dict(table)
                 }))
@@ -264,6 +289,7 @@ class GameHandler:
         success = game_engine.reset_table(table_id)
         
         if success:
+            self._cancel_round_timer(table_id)
             table = game_engine.get_table(table_id)
             
             # Broadcast reset to all players
@@ -282,7 +308,7 @@ class GameHandler:
         # Prepare detailed results for broadcast
         game_results = []
         for result in results:
-            player = next((p for p in table.players if p.id == result.player_id), None)
+            player = table.get_player(result.player_id)
             if player:
                 game_results.append({
                     "player_id": result.player_id,
@@ -307,8 +333,17 @@ class GameHandler:
             "table_state": self._get_table_state_dict(table)
         })
         
-        # Auto-start new round after 5 seconds
-        await asyncio.sleep(5)
+        # Auto-start new round after 5 seconds, without holding up this handler
+        self._cancel_round_timer(table_id)
+        self._round_timers[table_id] = asyncio.create_task(self._auto_new_round(table_id, 5.0))
+    
+    async def _auto_new_round(self, table_id: str, delay: float):
+        """Start a new round after a delay if the table still has players"""
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            if self._round_timers.get(table_id) is asyncio.current_task():
+                del self._round_timers[table_id]
         
         # Check if table still exists and has players
         current_table = game_engine.get_table(table_id)
@@ -321,24 +356,29 @@ class GameHandler:
                     "table_state": self._get_table_state_dict(current_table)
                 })
     
+    def _cancel_round_timer(self, table_id: str):
+        """Cancel a table's pending automatic new round, if any"""
+        timer = self._round_timers.pop(table_id, None)
+        if timer is not None:
+            timer.cancel()
+    
     async def _handle_chat_message(self, table_id: str, websocket: WebSocket, message: Dict[str, Any]):
         """Handle chat message"""
         player_id = message.get("player_id")
         player_name = message.get("player_name")
         chat_message = message.get("message")
-        timestamp = message.get("timestamp")
         
         if not player_name or not chat_message:
             await self._send_error(websocket, "Player name and message are required")
             return
         
-        # Broadcast chat message to all players at the table
+        # Broadcast chat message to all players at the table. The broadcast
+        # stamps it with the server's timestamp and encodes it once.
         await self.connection_manager.broadcast_to_table(table_id, {
             "type": "chat_message",
             "player_id": player_id,
             "player_name": player_name,
-            "message": chat_message,
-            "timestamp": timestamp or datetime.utcnow().isoformat()
+            "message": chat_message
         })
     
     async def _handle_new_round(self, table_id: str, websocket: WebSocket, message: Dict[str, Any]):
@@ -346,6 +386,7 @@ class GameHandler:
         success, msg = game_engine.new_round(table_id)
         
         if success:
+            self._cancel_round_timer(table_id)
             table = game_engine.get_table(table_id)
             
             # Broadcast new round to all players
@@ -357,12 +398,29 @@ class GameHandler:
         else:
             await self._send_error(websocket, msg)
     
+    # Handlers for each client message type
+    _MESSAGE_HANDLERS = {
+        "join_table": _handle_join_table,
+        "leave_table": _handle_leave_table,
+        "place_bet": _handle_place_bet,
+        "start_game": _handle_start_game,
+        "player_action": _handle_player_action,
+        "get_table_state": _handle_get_table_state,
+        "reset_table": _handle_reset_table,
+        "new_round": _handle_new_round,
+        "chat_message": _handle_chat_message
+    }
+    
     def _get_table_state_dict(self, table) -> Dict[str, Any]:
-        """Get table state as dictionary"""
+        """Get table state as dictionary (shared until the table changes; don't modify)"""
         if not table:
             return {}
         
-        return {
+        cached = self._table_states.get(table.id)
+        if cached is not None and cached[0] == table.version:
+            return cached[1]
+        
+        table_state = {
             "id": table.id,
             "name": table.name,
             "state": table.state,
@@ -372,33 +430,35 @@ class GameHandler:
             "current_player_index": table.current_player_index,
             "players": [self._get_player_dict(player) for player in table.players],
             "dealer": self._get_dealer_dict(table.dealer),
-            "deck_count": len(table.deck)
+            "deck_count": table.deck_count,
+            "session_seq": table.session_seq
         }
+        self._table_states[table.id] = (table.version, table_state)
+        return table_state
     
-    def _get_player_view(self, table, player_id: str) -> Dict[str, Any]:
+    def _get_player_view(self, table, player_id: Optional[str] = None) -> Dict[str, Any]:
         """Get table state from a specific player's perspective"""
         table_dict = self._get_table_state_dict(table)
         
         # Hide dealer's hole card if game is in progress and card is marked as hidden
-        if table.state in ["playing"] and table_dict.get("dealer"):
-            dealer_hand = table_dict["dealer"]["hand"]
-            if dealer_hand and dealer_hand.get("cards"):
-                # Create a copy of the cards to avoid modifying the original
-                cards_copy = []
-                for i, card in enumerate(dealer_hand["cards"]):
-                    if card.get("hidden", False):
-                        # Replace hidden card with a placeholder
-                        cards_copy.append({
-                            "suit": "hidden",
-                            "rank": "?",
-                            "value": 0,
-                            "hidden": True
-                        })
-                    else:
-                        cards_copy.append(card)
-                dealer_hand["cards"] = cards_copy
-        
-        return table_dict
+        if table.state != GameState.PLAYING or not table_dict.get("dealer"):
+            return table_dict
+        
+        dealer = table_dict["dealer"]
+        dealer_hand = dealer["hand"]
+        cards = dealer_hand["cards"]
+        hidden = [i for i, card in enumerate(cards) if card["hidden"]]
+        if not hidden:
+            return table_dict
+        
+        # The table state is shared, so swap in copies down to the cards
+        cards_copy = list(cards)
+        for i in hidden:
+            cards_copy[i] = HIDDEN_CARD
+        return {
+            **table_dict,
+            "dealer": {**dealer, "hand": {**dealer_hand, "cards": cards_copy}}
+        }
     
     def _get_player_dict(self, player) -> Dict[str, Any]:
         """Get player as dictionary"""
@@ -443,20 +503,14 @@ class GameHandler:
         if not card:
             return None
         
-        return {
-            "suit": card.suit,
-            "rank": card.rank,
-            "value": card.value,
-            "hidden": card.hidden
-        }
+        return card.to_dict()
     
     async def _send_error(self, websocket: WebSocket, message: str):
         """Send error message to websocket"""
         try:
-            await websocket.send_text(json.dumps({
-                "type": "error",
-                "message": message,
-                "timestamp": datetime.utcnow().isoformat()
-            }))
+            await websocket.send_bytes(_error_prefix(message) + encode_message(datetime.utcnow()) + b"}")
         except Exception as e:
-            print(f"Error sending error message: {e}") 
\ No newline at end of file
+            logger.warning("Error sending error message: %s", e)
+
+# Global game handler instance
+game_handler = GameHandler(connection_manager)
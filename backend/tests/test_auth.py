@@ -0,0 +1,92 @@
+import base64
+import time
+
+import jwt
+import orjson
+import pytest
+
+from app.api.auth import SIGNING_KEY, create_access_token, decode_access_token
+
+def b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def segments(token: str):
+    header, payload, signature = token.split(".")
+    return header, payload, signature
+
+@pytest.mark.parametrize("subject", ["a", "ab", "abc", "abcd", "player-with-a-longer-name"])
+def test_round_trip_for_every_padding_length(subject):
+    token = create_access_token({"sub": subject})
+    assert "=" not in token
+    assert decode_access_token(token)["sub"] == subject
+
+@pytest.mark.parametrize("subject", ["a", "ab", "abc", "abcd"])
+def test_tokens_interoperate_with_pyjwt(subject):
+    ours = create_access_token({"sub": subject})
+    assert jwt.decode(ours, SIGNING_KEY, algorithms=["HS256"])["sub"] == subject
+    
+    theirs = jwt.encode({"sub": subject, "exp": int(time.time()) + 60}, SIGNING_KEY, algorithm="HS256")
+    assert decode_access_token(theirs)["sub"] == subject
+
+def test_tampered_signature_is_rejected():
+    header, payload, signature = segments(create_access_token({"sub": "alice"}))
+    flipped = ("A" if signature[0] != "A" else "B") + signature[1:]
+    with pytest.raises(jwt.InvalidSignatureError):
+        decode_access_token(f"{header}.{payload}.{flipped}")
+
+def test_tampered_payload_is_rejected():
+    header, _, signature = segments(create_access_token({"sub": "alice"}))
+    payload = b64(orjson.dumps({"sub": "admin", "exp": int(time.time()) + 60}))
+    with pytest.raises(jwt.InvalidSignatureError):
+        decode_access_token(f"{header}.{payload}.{signature}")
+
+def test_signature_from_another_key_is_rejected():
+    token = jwt.encode({"sub": "alice"}, "some-other-secret-that-is-long-enough", algorithm="HS256")
+    with pytest.raises(jwt.InvalidSignatureError):
+        decode_access_token(token)
+
+def test_other_hmac_algorithm_is_rejected():
+    token = jwt.encode({"sub": "alice"}, SIGNING_KEY, algorithm="HS512")
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        decode_access_token(token)
+
+@pytest.mark.parametrize("signature", ["", "c2lnbmF0dXJl"])
+def test_none_algorithm_is_rejected(signature):
+    header = b64(orjson.dumps({"alg": "none", "typ": "JWT"}))
+    payload = b64(orjson.dumps({"sub": "alice"}))
+    with pytest.raises(jwt.InvalidAlgorithmError):
+        decode_access_token(f"{header}.{payload}.{signature}")
+
+def test_expired_token_is_rejected():
+    token = jwt.encode({"sub": "alice", "exp": int(time.time()) - 1}, SIGNING_KEY, algorithm="HS256")
+    with pytest.raises(jwt.ExpiredSignatureError):
+        decode_access_token(token)
+
+def test_non_numeric_expiry_is_rejected():
+    token = jwt.encode({"sub": "alice", "exp": "tomorrow"}, SIGNING_KEY, algorithm="HS256")
+    with pytest.raises(jwt.DecodeError):
+        decode_access_token(token)
+
+@pytest.mark.parametrize("token", [
+    "",
+    "abc",
+    "a.b",
+    "a.b.c.d",
+    "!!!.e30.c2ln",
+    "e30.!!!.c2ln",
+    "e30.e30.!!!",
+    "e30.e30.c2ln=",
+    "bm90IGpzb24.e30.c2ln",
+    "W10.e30.c2ln",
+    "é.e30.c2ln"
+])
+def test_malformed_tokens_are_rejected(token):
+    with pytest.raises(jwt.PyJWTError):
+        decode_access_token(token)
+
+def test_non_object_payload_is_rejected():
+    payload = b64(b"[1, 2]")
+    token = jwt.api_jws.encode(b"[1, 2]", SIGNING_KEY, algorithm="HS256")
+    assert segments(token)[1] == payload
+    with pytest.raises(jwt.DecodeError):
+        decode_access_token(token)
@@ -0,0 +1,74 @@
+import pytest
+
+from app.core.dealer_odds import OUTCOMES, dealer_probabilities
+from app.core.game_engine import game_engine
+from app.models.game import CARD_CODES, CardRank, GameState, Suit
+
+SIX_DECKS = (24, 24, 24, 24, 24, 24, 24, 24, 24, 96)
+
+def counts_of(**cards):
+    """Shoe counts by value from keyword counts like ace=1, ten=2"""
+    names = ("ace", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten")
+    return tuple(cards.get(name, 0) for name in names)
+
+def as_dict(probabilities):
+    return {outcome: p for outcome, p in zip(OUTCOMES, probabilities) if p}
+
+def test_ace_upcard_small_shoe():
+    # Without the peek the hole card is a ten (natural) or a six, and soft
+    # 17 hits to a hard 17 with the ten
+    shoe = counts_of(six=1, ten=1)
+    assert as_dict(dealer_probabilities(1, shoe)) == pytest.approx({"17": 0.5, "21": 0.5})
+    
+    # After the peek the hole card can only be the six
+    assert as_dict(dealer_probabilities(1, shoe, peeked=True)) == pytest.approx({"17": 1.0})
+
+def test_ten_upcard_small_shoe():
+    shoe = counts_of(ace=1, seven=3)
+    assert as_dict(dealer_probabilities(10, shoe)) == pytest.approx({"17": 0.75, "21": 0.25})
+    assert as_dict(dealer_probabilities(10, shoe, peeked=True)) == pytest.approx({"17": 1.0})
+
+def test_six_upcard_must_hit_to_bust():
+    assert as_dict(dealer_probabilities(6, counts_of(ten=5))) == pytest.approx({"bust": 1.0})
+
+@pytest.mark.parametrize("upcard, natural_index", [(1, 9), (10, 0)])
+def test_peek_removes_exactly_the_naturals(upcard, natural_index):
+    # Unconditioned odds mix in naturals with probability p; removing them
+    # and renormalizing must give the peeked odds
+    p = SIX_DECKS[natural_index] / sum(SIX_DECKS)
+    unpeeked = dealer_probabilities(upcard, SIX_DECKS)
+    peeked = dealer_probabilities(upcard, SIX_DECKS, peeked=True)
+    
+    expected = [
+        (q - (p if outcome == "21" else 0.0)) / (1 - p)
+        for outcome, q in zip(OUTCOMES, unpeeked)
+    ]
+    assert peeked == pytest.approx(expected)
+    assert sum(peeked) == pytest.approx(1.0)
+
+@pytest.mark.parametrize("upcard", range(2, 10))
+def test_peek_does_not_change_other_upcards(upcard):
+    assert dealer_probabilities(upcard, SIX_DECKS, peeked=True) == dealer_probabilities(upcard, SIX_DECKS)
+
+def test_engine_odds_are_conditioned_on_the_peek():
+    table = game_engine.create_table("Peeked odds")
+    _, _, player = game_engine.join_table(table.id, "alice")
+    
+    # Player 9 + 7 against a dealer ace with a five in the hole
+    dealt = [(Suit.HEARTS, CardRank.NINE), (Suit.SPADES, CardRank.ACE),
+             (Suit.HEARTS, CardRank.SEVEN), (Suit.SPADES, CardRank.FIVE)]
+    shoe = list(game_engine._master_shoe)
+    codes = [CARD_CODES[card] for card in dealt]
+    for code in codes:
+        shoe.remove(code)
+    table.shoe = bytes(codes + shoe)
+    table.deck_pos = 0
+    table.shoe_counts = game_engine._master_counts.copy()
+    
+    game_engine.place_bet(table.id, player.id, 10)
+    assert table.state == GameState.PLAYING
+    
+    unseen = game_engine._unseen_counts(table)
+    odds = game_engine.dealer_outcome_probabilities(table.id)
+    assert list(odds.values()) == pytest.approx(dealer_probabilities(1, unseen, peeked=True))
+    assert odds["21"] < dealer_probabilities(1, unseen)[OUTCOMES.index("21")] - 0.2
@@ -0,0 +1,71 @@
+import orjson
+import pytest
+
+from app.core.game_engine import game_engine
+from app.models.game import CARD_CODES, CardRank, GameState, Suit
+from app.websocket.connection_manager import ConnectionManager
+from app.websocket.game_handler import GameHandler
+
+class FakeWebSocket:
+    """Records the messages sent to it"""
+    
+    def __init__(self):
+        self.sent = []
+    
+    async def accept(self):
+        pass
+    
+    async def send_bytes(self, data: bytes):
+        self.sent.append(orjson.loads(data))
+    
+    @property
+    def types(self):
+        return [message["type"] for message in self.sent]
+
+def stack_shoe(table, *cards):
+    """Put cards at the front of the table's shoe, dealt in the given order"""
+    shoe = list(game_engine._master_shoe)
+    codes = [CARD_CODES[card] for card in cards]
+    for code in codes:
+        shoe.remove(code)
+    table.shoe = bytes(codes + shoe)
+    table.deck_pos = 0
+    table.shoe_counts = game_engine._master_counts.copy()
+
+@pytest.mark.asyncio
+async def test_dealer_blackjack_on_auto_start_finishes_round():
+    handler = GameHandler(ConnectionManager())
+    table = game_engine.create_table("Dealer blackjack")
+    _, _, player = game_engine.join_table(table.id, "alice")
+    
+    websocket = FakeWebSocket()
+    await handler.connection_manager.connect(websocket, table.id, player.id)
+    
+    # One player: player card, dealer upcard, player card, dealer hole card
+    stack_shoe(
+        table,
+        (Suit.HEARTS, CardRank.NINE),
+        (Suit.SPADES, CardRank.ACE),
+        (Suit.HEARTS, CardRank.SEVEN),
+        (Suit.SPADES, CardRank.KING)
+    )
+    
+    await handler.handle_message(table.id, websocket, {
+        "type": "place_bet",
+        "player_id": player.id,
+        "amount": 10
+    })
+    
+    try:
+        assert table.state == GameState.FINISHED
+        assert websocket.types == [
+            "place_bet_response",
+            "bet_placed",
+            "game_started",
+            "cards_dealt",
+            "game_finished"
+        ]
+        assert websocket.sent[-1]["dealer_hand"]["is_blackjack"]
+        assert table.id in handler._round_timers
+    finally:
+        handler._cancel_round_timer(table.id)
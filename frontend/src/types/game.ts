@@ -89,6 +89,7 @@ export interface GameTable {
   players: Player[];
   dealer: Dealer;
   deck_count: number;
+  session_seq: number;
 }
 
 export interface GameResult {